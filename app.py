@@ -1,127 +1,26 @@
+import datetime
+import json
+import logging
+import math
+import os
+import sys
+import time
 import tkinter as tk
+import zoneinfo
 from tkinter import ttk
 
-from tkcalendar import Calendar, DateEntry
-import calendar
-import datetime
-from datetime import date
-from typing import Any
-
-"""Finds actual meet up date based on a date description
-For example, if given "1st Monday of January 2022", the correct meetup date is January 3, 2022.
-"""
-
-
-# subclassing the built-in ValueError to create MeetupDayException
-class MeetupDayException(ValueError):
-    """Exception raised when the Meetup weekday and count do not result in a valid date.
-
-    message: explanation of the error.
-
-    """
-    def __init__(self, message):
-        self.message = message
-
-
-class MeetupDate:
-    """Finds actual meet up date based on a date description
-
-    For example, if given "1st Monday of January 2022", the correct meetup date is January 3, 2022.
-    """
-
-    occurrences = {'First': 1, 'Second': 2, 'Third': 3, 'Fourth': 4, 'Fifth': 5, 'Teenth': 13, 'Last': 99}
-    days_of_week = {'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3, 'Thursday': 4, 'Friday': 5, 'Saturday': 6}
-
-    @staticmethod
-    def find_last_occurrence(year, month, week_day):
-        """Finds the last occurrence of week_day in the month
-
-        :param year: the year of the meetup
-        :param month: the month of the meetup
-        :param week_day: the last
-        :return datetime.date: The date of the last meetup week_day
-        """
-
-        # create a calendar to work with
-        my_calendar = calendar.Calendar(calendar.SUNDAY)
-
-        # A 2d list that contains the days of the month in their proper positions in the week
-        weeks = my_calendar.monthdayscalendar(year, month)
-
-        for week in weeks[::-1]:  # reverse the weeks to find the last occurrence
-            if week[week_day] != 0:  # the first time this is not zero is the last occurrence
-                return date(year, month, week[week_day])
-
-    @staticmethod
-    def find_teenth_occurrence(year, month, week_day):
-        """Finds the week_day in teens of the month. Their are 7 days in the range 13-19
-
-        :param year: the year of the meetup
-        :param month: the month of the meetup
-        :param week_day: the day of the week that the meetup will occur
-        :return datetime.date: The actual date of the meetup
-        """
-
-        # create a calendar to work with
-        my_calendar = calendar.Calendar(calendar.SUNDAY)
-
-        # A 2d list that contains the days of the month in their proper positions in the week
-        weeks = my_calendar.monthdayscalendar(year, month)
-
-        # search through the weeks until we find a day of the week with a day of the month in the teens
-        for week in weeks:
-            if 13 <= week[week_day] <= 19:
-                return date(year, month, week[week_day])
-
-    @staticmethod
-    def find_nth_occurrence(year, month, week_day, occurrence):
-        """Finds the nth week_day of the month
-
-        :param year: The year of the meetup
-        :param month: The month of the meetup
-        :param week_day: The day of the week for the meetup
-        :param occurrence: The nth occurrence of the day of the week
-        :return datetime.date: The actual date of the meetup
-        """
-
-        # create a calendar to work with
-        my_calendar = calendar.Calendar(calendar.SUNDAY)
-
-        # A 2d list that contains the days of the month in their proper positions in the week
-        weeks = my_calendar.monthdayscalendar(year, month)
-
-        # a counter to keep track of how many the day of the week we have seen so far
-        count = 0
-        for week in weeks:
-            if week[week_day] != 0:
-                count += 1
-                if count == occurrence:  # nth occurrence?
-                    return date(year, month, week[week_day])
-        raise MeetupDayException('That day does not exist.')
-
-    @staticmethod
-    def meetup(year, month, week, day_of_week):
-        """Calculate the next occurrence of meetup date
-        :param year: The year to start looking for the next meetup
-        :param month: The month to start looking for the next meetup
-        :param week: The week of the meetup (first, second, third, fourth, fifth, teenth, last)
-        teenth is the days from 13 - 19
-        :param day_of_week: The weekday name
-        """
-        # occurrences = {'first': 1, 'second': 2, 'third': 3, 'fourth': 4, 'fifth': 5, 'teenth': 13, 'last': 99}
-        # days_of_week = {'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3, 'Thursday': 4, 'Friday': 5, 'Saturday': 6}
-        occurrence = MeetupDate.occurrences[week]
-        week_day = MeetupDate.days_of_week[day_of_week]
-
-        # find the last occurrence of the day of week
-        if occurrence == 99:  # the last occurrence
-            return MeetupDate.find_last_occurrence(year, month, week_day)
-
-        if occurrence == 13:  # the teenth day
-            return MeetupDate.find_teenth_occurrence(year, month, week_day)
-
-        # the first through fifth occurrence
-        return MeetupDate.find_nth_occurrence(year, month, week_day, occurrence)
+from core import (
+    CalendarCountdown,
+    CountdownTimer,
+    MeetupDate,
+    MeetupDayException,
+    MeetupRule,
+    TickStats,
+    TimerScheduler,
+)
+from hooks import ExpiryEvent, HookDispatcher, LogHook, logger
+from journal import JournalLocked, TimerJournal
+from shared import PAUSED, RUNNING, STOPPED, SharedCountdown, SharedFollower
 
 
 # class DigitEntry(tk.Entry):
@@ -162,15 +61,171 @@ class MeetupDate:
 #         self.bell()
 
 
+class RedrawBatcher:
+    """Collects display updates and pushes them to Tk together in one idle callback
+
+    When the scheduler ticks several timers in the same pass, their redraws all land in the same
+    after_idle() callback instead of each going to Tcl on its own.
+    """
+    def __init__(self, widget, stats=None):
+        """
+        :param widget: the widget whose after_idle() to use
+        :param stats: a TickStats to record the cost and the variable updates of each flush in
+        """
+        self.widget = widget
+        self.stats = stats
+        self._pending = {}  # display -> the values to render
+        self._handle = None
+
+    def request(self, display, values):
+        """Queues values to be rendered by display, replacing anything it already has queued"""
+        self._pending[display] = values
+        if self._handle is None:
+            self._handle = self.widget.after_idle(self.flush)
+
+    def discard(self, display):
+        """Drops anything display has queued"""
+        self._pending.pop(display, None)
+
+    def flush(self):
+        """Renders everything that was queued"""
+        self._handle = None
+        pending, self._pending = self._pending, {}
+        started = time.perf_counter()
+        updates = 0
+        for display, values in pending.items():
+            updates += display.render(values)
+        if self.stats is not None:
+            self.stats.redraw.add(time.perf_counter() - started)
+            self.stats.updates.add(updates)
+
+
+class FieldDisplay:
+    """Shows numbers in a row of StringVars, only setting the ones that changed
+
+    Every StringVar.set is a Tcl round-trip that also fires traces and validation, and the hours and
+    minutes rarely change, so the last rendered text of each field is remembered.
+    """
+    def __init__(self, variables, batcher=None, widths=None):
+        """Create a display over variables
+
+        :param variables: the StringVars to show the numbers in
+        :param batcher: a RedrawBatcher to coalesce redraws with, rendered immediately if not given
+        :param widths: how many digits to zero pad each number to, 2 each if not given
+        """
+        self.variables = variables
+        self.batcher = batcher
+        self.widths = widths or [2] * len(variables)
+        self.rendered = [None] * len(variables)
+
+    def update(self, *values):
+        """Shows values, one per variable, once the batcher flushes"""
+        if self.batcher is None:
+            self.render(values)
+        else:
+            self.batcher.request(self, values)
+
+    def render(self, values):
+        """Sets each variable whose zero padded value changed
+
+        :return int: how many variables were set"""
+        rendered = self.rendered
+        updates = 0
+        for index, (variable, value, width) in enumerate(zip(self.variables, values, self.widths)):
+            text = f'{value:0{width}}'
+            if text != rendered[index]:
+                variable.set(text)
+                rendered[index] = text
+                updates += 1
+        return updates
+
+    def clear(self):
+        """Empties every variable and drops any queued redraw"""
+        if self.batcher is not None:
+            self.batcher.discard(self)
+        for variable in self.variables:
+            variable.set('')
+        self.rendered = [''] * len(self.variables)
+
+
+class FractionField:
+    """The tenths or hundredths of a second shown after a seconds entry
+
+    The widgets are only put in the grid while fractions are being counted.
+    """
+
+    precisions = {'1 s': 0, '1/10 s': 1, '1/100 s': 2}
+
+    def __init__(self, master, row, column, font_size, redraws=None):
+        """Create the hidden widgets
+
+        :param master: the frame the seconds entry is in
+        :param row: the row of the seconds entry
+        :param column: the first free column after the seconds entry
+        :param font_size: the font size of the seconds entry
+        :param redraws: a RedrawBatcher to coalesce redraws with
+        """
+        self.row = row
+        self.column = column
+        self.redraws = redraws
+        self.var = tk.StringVar()
+        self.separator = ttk.Separator(master, orient='vertical')
+        self.entry = ttk.Entry(
+            master,
+            state='readonly',
+            textvariable=self.var,
+            font=('TkDefaultFont', font_size),
+            width=1,
+        )
+        self.label = ttk.Label(master)
+        self.display = None
+
+    def set_digits(self, digits):
+        """Shows digits digits of fractions, or hides the field when digits is 0"""
+        self.clear()
+        if not digits:
+            self.display = None
+            self.separator.grid_remove()
+            self.entry.grid_remove()
+            self.label.grid_remove()
+            return
+
+        self.display = FieldDisplay([self.var], self.redraws, widths=[digits])
+        self.entry.config(width=digits)
+        self.label.config(text=f'1/{10 ** digits}')
+        self.separator.grid(row=self.row, column=self.column, rowspan=2, sticky='ns')
+        self.entry.grid(row=self.row, column=self.column + 1, padx=5, pady=5)
+        self.label.grid(row=self.row + 1, column=self.column + 1)
+
+    def update(self, fraction):
+        """Shows fraction if the field is visible"""
+        if self.display is not None:
+            self.display.update(fraction)
+
+    def clear(self):
+        """Empties the field"""
+        if self.display is not None:
+            self.display.clear()
+
+
 class SimpleTimer(tk.Frame):
-    """Creates a simple countdown timer"""
-    def __init__(self, master):
+    """Creates a simple countdown timer
+
+    The counting is done by a CountdownTimer ticked by the shared scheduler, this frame only draws it.
+    """
+    def __init__(self, master, scheduler, redraws=None, fraction_digits=0, on_expire=None, name='Timer',
+                 journal=None, shared=None):
         super().__init__(master)
 
-        self.time_left = 0
-        self.paused = False
-        self.stopped = False
-        self.running = False
+        self.scheduler = scheduler
+        self.on_expire = on_expire
+        self.name = name
+        self.journal = journal
+        self.shared = shared  # the SharedCountdown to publish to, when this window owns the timers
+        self.followed = None
+        self.timer = CountdownTimer(scheduler.clock)
+        self.timer.listeners.append(self.on_timer_update)
+        self.timer.expire_listeners.append(self.on_timer_expire)
 
         self.font_size = 24
         # create some validation variables
@@ -181,6 +236,7 @@ class SimpleTimer(tk.Frame):
         self.hours_var = tk.StringVar()
         self.minutes_var = tk.StringVar()
         self.seconds_var = tk.StringVar()
+        self.display = FieldDisplay([self.hours_var, self.minutes_var, self.seconds_var], redraws)
 
         # create the widgets
 
@@ -239,6 +295,15 @@ class SimpleTimer(tk.Frame):
             command=self.timer_pause,
             state=tk.DISABLED,
         )
+        self.fraction = FractionField(self.display_frame, 0, 5, self.font_size, redraws)
+        self.precision = ttk.Combobox(
+            self.control_frame,
+            values=list(FractionField.precisions),
+            state='readonly',
+            width=7,
+        )
+        self.precision.current(fraction_digits)
+        self.precision.bind('<<ComboboxSelected>>', self.on_precision)
 
         # layout the widgets
 
@@ -258,7 +323,9 @@ class SimpleTimer(tk.Frame):
         self.start_button.grid(row=0, column=0, sticky='s', pady=(10, 0))
         self.pause_button.grid(row=0, column=1, sticky='s')
         self.stop_button.grid(row=0, column=2, sticky='s')
+        self.precision.grid(row=0, column=3, sticky='s', padx=(10, 0))
         self.control_frame.grid()  # (row=1, column=0, pady=(5, 10))
+        self.set_fraction_digits(fraction_digits)
 
         # add this frame to the parent layout
         # self.grid(row=0, column=0)
@@ -267,69 +334,159 @@ class SimpleTimer(tk.Frame):
 
     def clear_timer(self):
         """Sets the hour, minutes, seconds entry widgets to empty strings"""
-        self.hours_var.set('')
-        self.minutes_var.set('')
-        self.seconds_var.set('')
+        self.display.clear()
+        self.fraction.clear()
 
     def reset(self):
         """Resets the timer back to it's initial condition"""
         self.clear_timer()
         self.set_state(tk.NORMAL)
-        self.running = False
-        self.paused = False
-        self.stopped = False
-        self.time_left = 0
         self.start_button.config(state=tk.NORMAL)
         self.pause_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.DISABLED)
 
-    def get_HMS(self):
-        """Returns a tuple (hours, minutes, seconds)"""
-        seconds = self.time_left
-        hours = seconds // 3600
-        seconds -= hours * 3600
-        minutes = seconds // 60
-        seconds -= minutes * 60
-        return hours, minutes, seconds
-
     def update_display(self, hours, minutes, seconds):
         """Updates the hours, minutes and seconds display
 
         :param hours: hours left to count down
         :param minutes: minutes left to count down
         :param seconds: seconds left to count down"""
-        self.hours_var.set(hours)
-        self.minutes_var.set(minutes)
-        self.seconds_var.set(seconds)
+        self.display.update(hours, minutes, seconds)
 
-    def tick(self):
-        """Updates the time left, checks the stopped and paused flags, schedules the next call to tick"""
-        if self.stopped:
+    def on_timer_update(self, timer):
+        """Redraws the display after the scheduler ticks the timer
+
+        :param timer: the CountdownTimer that was ticked"""
+        if not timer.running:  # the timer was stopped
             self.reset()
             return
-        if not self.paused:
-            if self.time_left > 0:
-                self.time_left -= 1
-            hours, minutes, seconds = self.get_HMS()
-            self.update_display(hours, minutes, seconds)
-        self.after(1000, self.tick)
+        hours, minutes, seconds, fraction = timer.get_HMSF()
+        self.update_display(hours, minutes, seconds)
+        self.fraction.update(fraction)
+
+    def on_timer_expire(self, timer):
+        """Sounds the bell and hands the expiry to on_expire when the timer reaches zero
+
+        :param timer: the CountdownTimer that ran out"""
+        self.bell()
+        if self.journal is not None:
+            self.journal.record(self.name, 'expire')
+        if self.on_expire is not None:
+            self.on_expire(ExpiryEvent(self.name, time.time()))
+
+    def set_fraction_digits(self, digits):
+        """Counts and shows tenths (1) or hundredths (2) of a second, or whole seconds (0)
+
+        :param digits: the number of fraction digits"""
+        self.timer.set_fraction_digits(digits)
+        self.fraction.set_digits(digits)
+        if self.timer.running and not self.timer.paused:
+            self.scheduler.schedule(self.timer)  # redraw now and pick up the new rate
+
+    def on_precision(self, _):
+        """Switches to the precision picked in the combobox"""
+        self.set_fraction_digits(FractionField.precisions[self.precision.get()])
+
+    def set_visible(self, visible):
+        """Lets the timer know whether it can be seen, a hidden timer only wakes up when it runs out
+
+        :param visible: True when the tab is selected and the window is not iconified"""
+        if visible == self.timer.visible:
+            return
+        self.timer.visible = visible
+        if self.timer.running and not self.timer.paused:
+            self.scheduler.schedule(self.timer)  # redraw now and pick up the new rate
 
     def timer_start(self):
-        """Sets up the timer to run and starts the callback tick"""
+        """Sets up the timer to run and hands it to the scheduler"""
         hours = int(self.hours_var.get()) if self.hours_var.get() else 0
         minutes = int(self.minutes_var.get()) if self.minutes_var.get() else 0
         seconds = int(self.seconds_var.get()) if self.seconds_var.get() else 0
-        self.running = True
+        total = hours * 3600 + minutes * 60 + seconds
+        self.set_running()
+        self.timer.start(total)
+        if self.journal is not None:
+            self.journal.record(self.name, 'start', deadline=time.time() + total)
+        self.publish()
+        self.scheduler.schedule(self.timer)
+
+    def set_running(self):
+        """Locks the entries and enables pause and stop"""
         self.set_state(tk.DISABLED)
         self.pause_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.NORMAL)
         self.start_button.config(state=tk.DISABLED)
-        self.time_left = hours * 3600 + minutes * 60 + seconds
-        self.tick()
+
+    def restore(self, state):
+        """Picks up a timer saved in the journal, counting the time the app was closed
+
+        :param state: the timer's state from the journal, see journal.py"""
+        paused_at = state['paused_at']
+        remaining = max(0.0, state['deadline'] - (paused_at if paused_at is not None else time.time()))
+        self.set_running()
+        self.timer.start(remaining)
+        if paused_at is not None:
+            self.timer.tick(self.timer.clock())  # draw the time left, a paused timer isn't ticked
+            self.timer.toggle_pause()
+        else:
+            self.scheduler.schedule(self.timer)
+        self.publish()
+
+    def publish(self):
+        """Writes the timer's deadline and pause state to the shared block, if there is one"""
+        if self.shared is None:
+            return
+        timer = self.timer
+        if not timer.running:
+            self.shared.publish(timer=STOPPED)
+        elif timer.paused:
+            self.shared.publish(timer=PAUSED, remaining=timer.remaining())
+        else:
+            self.shared.publish(timer=RUNNING, deadline=timer.deadline + timer.paused_total)
+
+    def follow(self, state):
+        """Mirrors the timer published by the owning window
+
+        :param state: the SharedState read from the shared block"""
+        followed = (state.timer, state.deadline, state.remaining)
+        if followed == self.followed:  # something else changed
+            return
+        self.followed = followed
+        self.scheduler.unschedule(self.timer)
+        if state.timer == STOPPED:
+            if self.timer.running:
+                self.timer.stop()
+            return
+        if state.timer == RUNNING and state.deadline <= self.timer.clock():
+            # it ran out before this window saw it, the owner already dealt with the expiry
+            if self.timer.running:
+                self.timer.stop()
+            return
+        self.set_running()
+        if state.timer == RUNNING:
+            self.timer.start_until(state.deadline)
+            self.scheduler.schedule(self.timer)
+        else:
+            self.timer.start(state.remaining)
+            self.timer.tick(self.timer.clock())  # draw the time left, a paused timer isn't ticked
+            self.timer.toggle_pause()
+
+    def set_following(self):
+        """Hides the controls, the owning window drives the timer"""
+        self.start_button.grid_remove()
+        self.pause_button.grid_remove()
+        self.stop_button.grid_remove()
 
     def timer_pause(self):
-        """Toggles the paused flag"""
-        self.paused = not self.paused
+        """Toggles the paused flag, a paused timer has no pending tick at all"""
+        self.timer.toggle_pause()
+        if self.journal is not None:
+            self.journal.record(self.name, 'pause' if self.timer.paused else 'resume', at=time.time())
+        self.publish()
+        if self.timer.paused:
+            self.scheduler.unschedule(self.timer)
+        else:
+            self.scheduler.schedule(self.timer)
 
     def set_state(self, state):
         """Changes the state of the hour, minute, second entry widgets
@@ -348,9 +505,12 @@ class SimpleTimer(tk.Frame):
         self.seconds_entry.config(state=state)
 
     def timer_stop(self):
-        """Sets the stopped flag and disables the stop button"""
-        self.stopped = True
-        self.stop_button.config(state=tk.DISABLED)
+        """Cancels the pending tick and stops the timer, which resets the display"""
+        self.scheduler.unschedule(self.timer)
+        if self.journal is not None:
+            self.journal.record(self.name, 'stop')
+        self.timer.stop()
+        self.publish()
 
     def validate(self, value):
         """Verifies that value is an integer in the range 0-99
@@ -414,8 +574,9 @@ class PlaceholderEntry(tk.Entry):
 
 # TODO: make this a modal window
 class MeetupTimerSet(tk.Frame):
-    def __init__(self, master, **kw):
+    def __init__(self, master, on_set=None, **kw):
         super().__init__(master, **kw)
+        self.on_set = on_set
 
         yvcmd = (self.register(self.validate_year), '%P')
         yivcmd = (self.register(self.on_invalid_year), '%P')
@@ -432,14 +593,64 @@ class MeetupTimerSet(tk.Frame):
         combo_times = [x + ' AM' for x in half_hours] + [x + ' PM' for x in half_hours]
         self.start_time = ttk.Combobox(self, values=combo_times)
         self.start_time.current(0)
-        self.pick_date = ttk.Button(self, text='Pick Date')
+        self.pick_date = ttk.Button(self, text='Pick Date', command=self.on_pick_date)
+        self.week = ttk.Combobox(self, values=list(MeetupDate.occurrences), state='readonly', width=8)
+        self.week.current(0)
+        self.day_of_week = ttk.Combobox(self, values=list(MeetupDate.days_of_week), state='readonly', width=10)
+        self.day_of_week.current(1)
+        # blank means the computer's own time zone
+        self.zone = ttk.Combobox(self, values=[''] + sorted(zoneinfo.available_timezones()), width=24)
+        self.ok_button = ttk.Button(self, text='OK', command=self.on_ok)
 
         self.start_date.grid(row=0, column=0)
         self.start_time.grid(row=1, column=0)
         self.pick_date.grid(row=0, column=1)
+        self.week.grid(row=2, column=0)
+        self.day_of_week.grid(row=2, column=1)
+        self.zone.grid(row=3, column=0, columnspan=2)
+        self.ok_button.grid(row=4, column=0, columnspan=2)
 
         self.pack()
 
+    def on_pick_date(self):
+        """Opens a calendar to pick the start date from"""
+        # tkcalendar is only loaded the first time somebody asks for a calendar
+        from tkcalendar import Calendar
+
+        picker = tk.Toplevel(self)
+        picker.title('Pick Date')
+        calendar = Calendar(picker, selectmode='day', date_pattern='mm/dd/yyyy')
+        calendar.pack()
+
+        def choose():
+            self.start_date.focus_in()  # clears the placeholder text
+            self.start_date.delete(0, tk.END)
+            self.start_date.insert(0, calendar.get_date())
+            picker.destroy()
+
+        ttk.Button(picker, text='OK', command=choose).pack()
+
+    def get_start_date(self):
+        """Returns the date typed in the start date entry, None if there isn't one"""
+        if self.start_date['fg'] == self.start_date.placeholdercolor:
+            return None
+        return datetime.datetime.strptime(self.start_date.get(), '%m/%d/%Y').date()
+
+    def on_ok(self):
+        """Hands the rule, start time, start date and zone to on_set and closes the window"""
+        zone = self.zone.get().strip() or None
+        try:
+            start_time = datetime.datetime.strptime(self.start_time.get(), '%I:%M %p').time()
+            start_date = self.get_start_date()
+            if zone is not None:
+                zoneinfo.ZoneInfo(zone)
+        except (ValueError, zoneinfo.ZoneInfoNotFoundError):
+            self.bell()
+            return
+        if self.on_set is not None:
+            self.on_set(MeetupRule(self.week.get(), self.day_of_week.get()), start_time, start_date, zone)
+        self.master.destroy()
+
     def validate_year(self, value):
         if (value.strip().isdigit() and len(value) <= 4) or value == '':
             return True
@@ -461,16 +672,31 @@ class MeetupTimerSet(tk.Frame):
 
 class MeetupTimer(tk.Frame):
     """Creates a meetup countdown timer
+
+    The counting is done by a CalendarCountdown ticked by the shared scheduler, this frame only draws it.
     """
-    def __init__(self, master):
+    def __init__(self, master, scheduler, redraws=None, fraction_digits=0, name='Meetup', journal=None,
+                 shared=None):
         super().__init__(master)
         self.font_size = 24
+        self.scheduler = scheduler
+        self.name = name
+        self.journal = journal
+        self.shared = shared  # the SharedCountdown to publish to, when this window owns the timers
+        self.followed = None
+        self.countdown = CalendarCountdown(scheduler.clock, fraction_digits=fraction_digits)
+        self.countdown.listeners.append(self.on_countdown_update)
         self.years_var = tk.StringVar(value='')
         self.months_var = tk.StringVar(value='')
         self.days_var = tk.StringVar(value='')
         self.hours_var = tk.StringVar(value='')
         self.minutes_var = tk.StringVar(value='')
         self.seconds_var = tk.StringVar(value='')
+        self.target_var = tk.StringVar(value='')
+        self.display = FieldDisplay(
+            [self.years_var, self.months_var, self.days_var, self.hours_var, self.minutes_var, self.seconds_var],
+            redraws,
+        )
 
         # create the widgets
         # self.display = CountDownDisplay(self, ymd=True, digits=2)
@@ -530,54 +756,346 @@ class MeetupTimer(tk.Frame):
         ttk.Label(self, text='M').grid(column=2, row=1)
         ttk.Label(self, text='D').grid(column=4, row=1)
 
+        self.fraction = FractionField(self, 2, 5, self.font_size, redraws)
+
         self.setup_button = ttk.Button(self, text='Set', command=self.set_timer)
+        self.precision = ttk.Combobox(
+            self,
+            values=list(FractionField.precisions),
+            state='readonly',
+            width=7,
+        )
+        self.precision.current(fraction_digits)
+        self.precision.bind('<<ComboboxSelected>>', self.on_precision)
 
         # add the widgets
         self.setup_button.grid(row=4, column=0, columnspan=5)
+        self.precision.grid(row=5, column=0, columnspan=5)
+        ttk.Label(self, textvariable=self.target_var).grid(row=6, column=0, columnspan=7)
+        self.set_fraction_digits(fraction_digits)
 
         # self.grid(row=0, column=0)
 
     def reset(self):
-        pass
+        """Stops the countdown and empties the display"""
+        self.scheduler.unschedule(self.countdown)
+        self.countdown.reset()
+        self.display.clear()
+        self.fraction.clear()
+        self.target_var.set('')
+
+    def start(self, rule, start_time, start_date=None, zone=None):
+        """Counts down to the next meetup of rule
+
+        :param rule: the MeetupRule of the meetup
+        :param start_time: the datetime.time the meetup starts
+        :param start_date: the first date to look for a meetup on, today if not given
+        :param zone: the IANA name of the meetup's time zone, the computer's own if not given
+        """
+        self.reset()
+        self.countdown.set_zone(zone)
+        try:
+            target = self.countdown.start_meetup(rule, time_of_day=start_time, start=start_date)
+        except MeetupDayException as error:
+            self.target_var.set(error.message)
+            if self.journal is not None:
+                self.journal.record(self.name, 'stop')
+            if self.shared is not None:
+                self.shared.publish(meetup=False)
+            return
+        if self.journal is not None:
+            self.journal.record(
+                self.name,
+                'meetup',
+                week=rule.week,
+                day_of_week=rule.day_of_week,
+                time=start_time.strftime('%H:%M'),
+                start_date=start_date.isoformat() if start_date is not None else None,
+                zone=zone,
+            )
+        self.target_var.set(f'{rule} {target:%B %d, %Y %I:%M %p} {zone or ""}'.rstrip())
+        if self.shared is not None:
+            self.shared.publish(meetup=True, target=self.countdown.target_timestamp, zone=zone or '',
+                                label=self.target_var.get())
+        self.scheduler.schedule(self.countdown)
+
+    def restore(self, state):
+        """Counts down to the meetup saved in the journal again
+
+        :param state: the meetup's state from the journal, see journal.py"""
+        start_date = state['start_date']
+        self.start(
+            MeetupRule(state['week'], state['day_of_week']),
+            datetime.datetime.strptime(state['time'], '%H:%M').time(),
+            datetime.date.fromisoformat(start_date) if start_date is not None else None,
+            state['zone'],
+        )
+
+    def follow(self, state):
+        """Mirrors the meetup published by the owning window
+
+        :param state: the SharedState read from the shared block"""
+        followed = (state.meetup, state.target, state.zone, state.label)
+        if followed == self.followed:  # something else changed
+            return
+        self.followed = followed
+        self.reset()
+        if not state.meetup:
+            return
+        self.countdown.set_zone(state.zone or None)
+        self.countdown.start_at(state.target)
+        self.target_var.set(state.label)
+        self.scheduler.schedule(self.countdown)
+
+    def set_following(self):
+        """Hides the Set button, the owning window picks the meetup"""
+        self.setup_button.grid_remove()
+
+    def on_countdown_update(self, countdown):
+        """Redraws the display after the scheduler ticks the countdown
+
+        :param countdown: the CalendarCountdown that was ticked"""
+        years, months, days, hours, minutes, seconds, fraction = countdown.get_YMDHMSF()
+        self.display.update(years, months, days, hours, minutes, seconds)
+        self.fraction.update(fraction)
+
+    def set_fraction_digits(self, digits):
+        """Counts and shows tenths (1) or hundredths (2) of a second, or whole seconds (0)
+
+        :param digits: the number of fraction digits"""
+        self.countdown.set_fraction_digits(digits)
+        self.fraction.set_digits(digits)
+        if self.countdown.running:
+            self.scheduler.schedule(self.countdown)  # redraw now and pick up the new rate
+
+    def on_precision(self, _):
+        """Switches to the precision picked in the combobox"""
+        self.set_fraction_digits(FractionField.precisions[self.precision.get()])
+
+    def set_visible(self, visible):
+        """Lets the countdown know whether it can be seen, a hidden countdown only wakes up when it runs out
+
+        :param visible: True when the tab is selected and the window is not iconified"""
+        if visible == self.countdown.visible:
+            return
+        self.countdown.visible = visible
+        if self.countdown.running:
+            self.scheduler.schedule(self.countdown)  # redraw now and pick up the new rate
 
     def set_timer(self):
         setup_window = tk.Toplevel(self.master)
         setup_window.title('Set Timer')
-        MeetupTimerSet(setup_window)
-        print('hello')
+        MeetupTimerSet(setup_window, on_set=self.start)
+
+
+class StatsPanel(ttk.Frame):
+    """Shows the scheduler's TickStats, refreshed every second while the panel is visible"""
+
+    units = {'lateness': 'ms', 'tick': 'ms', 'redraw': 'ms', 'updates': 'vars'}
+
+    def __init__(self, master, stats, refresh=1000):
+        """
+        :param master: the parent widget
+        :param stats: the TickStats to show
+        :param refresh: how often to refresh, in milliseconds
+        """
+        super().__init__(master)
+        self.stats = stats
+        self.refresh = refresh
+        self.visible = False
+        self._handle = None
+
+        self.rows = {}
+        for column, heading in enumerate(['', 'count', 'mean', 'p50', 'p99', 'max']):
+            ttk.Label(self, text=heading).grid(row=0, column=column, padx=5, sticky='e')
+        for row, name in enumerate(self.units, start=1):
+            ttk.Label(self, text=f'{name} ({self.units[name]})').grid(row=row, column=0, padx=5, sticky='w')
+            variables = [tk.StringVar() for _ in range(5)]
+            for column, variable in enumerate(variables, start=1):
+                ttk.Label(self, textvariable=variable).grid(row=row, column=column, padx=5, sticky='e')
+            self.rows[name] = variables
+        ttk.Button(self, text='Reset', command=self.on_reset).grid(row=len(self.units) + 1, column=0, columnspan=6)
+
+    def set_visible(self, visible):
+        """Refreshes only while the panel can be seen, so watching the numbers doesn't skew them
+
+        :param visible: True when the tab is selected and the window is not iconified"""
+        self.visible = visible
+        if visible and self._handle is None:
+            self.update_numbers()
+
+    def update_numbers(self):
+        """Shows the latest numbers and comes back in refresh milliseconds"""
+        self._handle = None
+        if not self.visible:
+            return
+        for name, summary in self.stats.summary().items():
+            scale = 1000 if self.units[name] == 'ms' else 1
+            values = [summary['count']] + [summary[key] * scale for key in ('mean', 'p50', 'p99', 'max')]
+            for variable, value in zip(self.rows[name], values):
+                variable.set(f'{value:.3f}' if isinstance(value, float) else value)
+        self._handle = self.after(self.refresh, self.update_numbers)
+
+    def on_reset(self):
+        """Starts counting from scratch"""
+        self.stats.reset()
+        self.update_numbers()
 
 
 class View(tk.Frame):
-    def __init__(self, master):
+    def __init__(self, master, scheduler, redraws, on_expire=None, journal=None, shared=None, follower=None):
         super().__init__(master)
 
         self.rowconfigure(0, weight=2)
         self.columnconfigure(0, weight=2)
 
         self.notebook = ttk.Notebook(self)
-        simple_timer = SimpleTimer(self.notebook)
-        meetup_timer = MeetupTimer(self.notebook)
+        simple_timer = SimpleTimer(self.notebook, scheduler, redraws, on_expire=on_expire, journal=journal,
+                                   shared=shared)
+        meetup_timer = MeetupTimer(self.notebook, scheduler, redraws, journal=journal, shared=shared)
         simple_timer.grid(row=0, column=0, sticky=tk.NSEW)
         meetup_timer.grid(sticky=tk.NSEW)
         self.notebook.rowconfigure(0, weight=1)
         self.notebook.columnconfigure(0, weight=1)
-        self.notebook.add(simple_timer, text='Timer')
-        self.notebook.add(meetup_timer, text='Meetup')
+        self.notebook.add(simple_timer, text=simple_timer.name)
+        self.notebook.add(meetup_timer, text=meetup_timer.name)
         self['background'] = 'blue'
         self.notebook.grid(sticky=tk.NSEW)
 
         self.grid(padx=10, pady=10, sticky=tk.NSEW)
 
+        # hidden timers slow down, so keep them told whether they can be seen
+        self.tabs = [simple_timer, meetup_timer]
+        if scheduler.stats is not None:  # debugging, show how well the timers are keeping up
+            stats_panel = StatsPanel(self.notebook, scheduler.stats)
+            self.notebook.add(stats_panel, text='Stats')
+            self.tabs.append(stats_panel)
+        self.notebook.bind('<<NotebookTabChanged>>', self.update_visibility)
+        self.master.bind('<Map>', self.update_visibility, add='+')
+        self.master.bind('<Unmap>', self.update_visibility, add='+')
+
+        # carry on with whatever was running when the app last closed
+        if journal is not None:
+            for tab in (simple_timer, meetup_timer):
+                state = journal.states.get(tab.name)
+                if state is not None:
+                    tab.restore(state)
+
+        # another window owns the timers, just show what it publishes
+        if follower is not None:
+            for tab in (simple_timer, meetup_timer):
+                tab.set_following()
+                follower.listeners.append(tab.follow)
+            scheduler.schedule(follower)
+
+    def update_visibility(self, _=None):
+        """Tells each tab whether it is selected in a window that is not iconified"""
+        shown = self.master.state() != 'iconic'
+        selected = self.notebook.select()
+        for tab in self.tabs:
+            tab.set_visible(shown and str(tab) == selected)
+
 
 class App(tk.Tk):
-    def __init__(self):
+    def __init__(self, hooks=None, journal_dir=os.path.join(os.path.expanduser('~'), '.countdown'), debug=False,
+                 stats_path=None, stats_interval=60, share=None, share_name='countdown'):
+        """
+        :param hooks: the ExpiryHooks to run when a timer runs out, a LogHook if not given
+        :param journal_dir: where to journal running timers, None to not keep them
+        :param debug: measure how well the timers keep up and show the numbers in a Stats tab
+        :param stats_path: a file to append the numbers to as JSON lines, turns on measuring too
+        :param stats_interval: how often to append to stats_path, in seconds
+        :param share: 'owner' to publish the timers to other windows, 'follower' to show an owner's timers
+        :param share_name: the name of the shared memory block, the same for the owner and its followers
+        """
+        if share not in (None, 'owner', 'follower'):
+            raise ValueError("share must be 'owner' or 'follower'")
+        # one window owns the timers and publishes them, the followers only mirror what it publishes.
+        # Opened before the window so a follower without an owner fails without leaving one behind
+        self.shared = SharedCountdown(share_name, owner=share == 'owner') if share is not None else None
         super().__init__()
 
         self.title('Countdown Timer')
 
-        view = View(self)
+        self.stats = TickStats() if debug or stats_path is not None else None
+        # one scheduler drives every timer through a single pending after() callback
+        self.scheduler = TimerScheduler(
+            arm=lambda delay, callback: self.after(math.ceil(delay * 1000), callback),
+            cancel=self.after_cancel,
+            stats=self.stats,
+        )
+        # redraws from the same scheduler pass are pushed to Tk together
+        self.redraws = RedrawBatcher(self, self.stats)
+        # expiry hooks run on worker threads, their results come back through poll_hooks
+        self.hooks = HookDispatcher([LogHook()] if hooks is None else hooks)
+        self.hook_poller = None
+        follower = SharedFollower(self.shared) if share == 'follower' else None
+        # running timers are journaled so they survive a crash or restart, None turns that off
+        self.journal = None
+        if journal_dir is not None and follower is None:
+            try:
+                self.journal = TimerJournal(journal_dir)
+            except JournalLocked as error:  # another window is journaling, don't fight over its timers
+                logger.warning('not keeping timers: %s', error)
+        publish_to = self.shared if share == 'owner' else None
+        # the owner runs the hooks, a follower running them too would run them once per screen
+        on_expire = self.fire_hooks if follower is None else None
+        view = View(self, self.scheduler, self.redraws, on_expire=on_expire, journal=self.journal,
+                    shared=publish_to, follower=follower)
+
+        self.stats_path = stats_path
+        self.stats_interval = stats_interval
+        if stats_path is not None:
+            self.after(stats_interval * 1000, self.dump_stats)
+
+    def dump_stats(self):
+        """Appends a JSON line of the numbers so far to stats_path"""
+        line = {'time': time.time(), 'timers': len(self.scheduler), **self.stats.summary()}
+        with open(self.stats_path, 'a') as stats_file:
+            stats_file.write(json.dumps(line) + '\n')
+        self.after(self.stats_interval * 1000, self.dump_stats)
+
+    def fire_hooks(self, event):
+        """Hands an expiry to the hooks and makes sure their results get collected
+
+        :param event: the ExpiryEvent of the timer that ran out"""
+        self.hooks.fire(event)
+        if self.hook_poller is None:
+            self.hook_poller = self.after(100, self.poll_hooks)
+
+    def poll_hooks(self):
+        """Collects the results of finished hooks, polling only while some are outstanding"""
+        for result in self.hooks.drain():
+            if not result.ok:
+                logger.warning('%s failed for timer %s: %s', result.hook, result.event.name, result.detail)
+        if self.hooks.busy():
+            self.hook_poller = self.after(100, self.poll_hooks)
+        else:
+            self.hook_poller = None
+
+    def destroy(self):
+        self.hooks.shutdown()
+        if self.journal is not None:
+            self.journal.close()
+        if self.shared is not None:
+            self.shared.close()
+        super().destroy()
 
 
 if __name__ == "__main__":
-    app = App()
+    if sys.argv[1:2] == ['resolve']:  # batch mode, no window
+        import cli
+        sys.exit(cli.main(sys.argv[2:]))
+    if sys.argv[1:2] == ['export']:
+        import export
+        sys.exit(export.main(sys.argv[2:]))
+
+    logging.basicConfig(level=logging.INFO)
+    # --debug shows the Stats tab, --stats=FILE also appends the numbers to FILE every minute,
+    # --share=owner publishes the timers to other windows started with --share=follower
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    try:
+        app = App(debug='--debug' in sys.argv[1:], stats_path=options.get('stats'), share=options.get('share'))
+    except FileNotFoundError as error:  # a follower with no owner to follow
+        sys.exit(str(error))
     app.mainloop()
@@ -0,0 +1,48 @@
+"""Measures how long it takes to import each module in a fresh interpreter
+
+Uses python -X importtime, so every run pays for its own imports from a cold sys.modules.
+Run from the repository root:
+    python benchmarks/bench_import.py [module ...]
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUI_MODULES = ('tkinter', 'tkcalendar')
+
+
+def import_times(module):
+    """Imports module in a fresh interpreter
+
+    :param module: the name of the module to import
+    :return dict: the cumulative import time in microseconds of every module that was imported
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(modules):
+    for module in modules:
+        runs = [import_times(module) for _ in range(5)]
+        best = min(run[module] for run in runs)
+        gui = sorted(name for name in runs[0] if name.split('.')[0] in GUI_MODULES)
+        print(f'{module:>14}: {best / 1000:8.1f} ms, {len(runs[0])} modules imported'
+              + (f', GUI: {", ".join(gui)}' if gui else ''))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or ['core', 'meetup_table', 'app'])
@@ -0,0 +1,80 @@
+"""Compares the closed-form meetup resolver with the calendar scanning methods
+
+Run from the repository root:
+    python benchmarks/bench_meetup.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import MeetupDate, MeetupDayException  # noqa: E402
+
+
+def scan(year, month, week_day, occurrence):
+    """Resolves a meetup the original way, by scanning a month calendar"""
+    if occurrence == 99:
+        return MeetupDate.find_last_occurrence(year, month, week_day)
+    if occurrence == 13:
+        return MeetupDate.find_teenth_occurrence(year, month, week_day)
+    return MeetupDate.find_nth_occurrence(year, month, week_day, occurrence)
+
+
+def resolve_all(resolver, years):
+    """Resolves every rule for every month of the given years"""
+    for year in years:
+        for month in range(1, 13):
+            for occurrence in MeetupDate.occurrences.values():
+                for week_day in range(7):
+                    try:
+                        resolver(year, month, week_day, occurrence)
+                    except MeetupDayException:
+                        pass
+
+
+def check(years):
+    """Makes sure both resolvers agree before timing them"""
+    for year in years:
+        for month in range(1, 13):
+            for occurrence in MeetupDate.occurrences.values():
+                for week_day in range(7):
+                    try:
+                        expected = scan(year, month, week_day, occurrence)
+                    except MeetupDayException:
+                        expected = None
+                    try:
+                        actual = MeetupDate.find_occurrence(year, month, week_day, occurrence)
+                    except MeetupDayException:
+                        actual = None
+                    assert actual == expected, (year, month, week_day, occurrence, actual, expected)
+
+
+def main():
+    years = range(2000, 2400)
+    check(years)
+
+    calls = len(years) * 12 * len(MeetupDate.occurrences) * 7
+    for name, resolver in (('scan', scan), ('closed form', MeetupDate.find_occurrence)):
+        seconds = min(timeit.repeat(lambda: resolve_all(resolver, years), number=1, repeat=3))
+        print(f'{name:>12}: {calls / seconds:12,.0f} resolutions/s ({seconds * 1e9 / calls:,.0f} ns each)')
+
+    try:
+        import numpy as np
+    except ImportError:
+        print('     batched: skipped, numpy is not installed')
+        return
+
+    # the same rows as resolve_all, as columns
+    rows = np.arange(calls)
+    week_days = rows % 7
+    occurrences = np.array(list(MeetupDate.occurrences.values()))[rows // 7 % len(MeetupDate.occurrences)]
+    months = rows // (7 * len(MeetupDate.occurrences)) % 12 + 1
+    years = rows // (7 * len(MeetupDate.occurrences) * 12) + years.start
+    seconds = min(timeit.repeat(lambda: MeetupDate.meetup_many(years, months, occurrences, week_days),
+                                number=1, repeat=3))
+    print(f'{"batched":>12}: {calls / seconds:12,.0f} resolutions/s ({seconds * 1e9 / calls:,.0f} ns each)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Times the hot paths against a saved baseline, headless
+
+Measures MeetupDate.meetup per kind of rule over a whole 400-year cycle, the cost of the exception
+raised for a Fifth that doesn't exist, the tick loop behind SimpleTimer over three simulated hours
+with a fake clock and a fake after(), and the cold import of app. Every number is lower-is-better.
+
+Run from the repository root:
+    python benchmarks/suite.py --save       # record a baseline for this machine
+    python benchmarks/suite.py              # compare, exits 1 if anything got slower than the threshold
+
+A metric that looks slower is measured again, up to --retries times, keeping its best, so one noisy
+run doesn't count as a regression.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_import import import_times  # noqa: E402
+from core import CountdownTimer, MeetupDate, MeetupDayException, TimerScheduler  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+YEARS = range(2000, 2400)
+RULES = {
+    'nth': ['First', 'Second', 'Third', 'Fourth'],
+    'teenth': ['Teenth'],
+    'last': ['Last'],
+}
+
+
+def per_call(function, calls, repeat=9):
+    """Returns the best time of function over repeat runs, in nanoseconds per call"""
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1e9 / calls
+
+
+def meetup_rows(weeks):
+    """Returns (year, month, week, day_of_week) for every month of the cycle, week and weekday"""
+    return [(year, month, week, day_of_week)
+            for year in YEARS
+            for month in range(1, 13)
+            for week in weeks
+            for day_of_week in MeetupDate.days_of_week]
+
+
+def bench_meetup(weeks):
+    """Nanoseconds per MeetupDate.meetup call for rules that always exist"""
+    rows = meetup_rows(weeks)
+    meetup = MeetupDate.meetup
+
+    def run():
+        for row in rows:
+            meetup(*row)
+    return per_call(run, len(rows))
+
+
+def bench_fifth_missing():
+    """Nanoseconds per MeetupDate.meetup call for a Fifth that doesn't exist, raising and catching included"""
+    rows = []
+    for row in meetup_rows(['Fifth']):
+        try:
+            MeetupDate.meetup(*row)
+        except MeetupDayException:
+            rows.append(row)
+    meetup = MeetupDate.meetup
+
+    def run():
+        for row in rows:
+            try:
+                meetup(*row)
+            except MeetupDayException:
+                pass
+    return per_call(run, len(rows))
+
+
+def simulate_timer(hours=3, fraction_digits=0, late=0.005, seed=0):
+    """Runs a CountdownTimer through the scheduler on a fake clock, every after() firing up to late seconds late
+
+    :return tuple[int, float, float]: the ticks run, the worst time between a displayed second changing
+        and when it should have, and how late the timer ran out, both in seconds
+    """
+    jitter = random.Random(seed)
+    now = 0.0
+    pending = {}  # handle -> (due, callback), like Tk's after queue
+    handles = iter(range(1, 2 ** 62))
+
+    def arm(delay, callback):
+        handle = next(handles)
+        pending[handle] = (now + delay + jitter.uniform(0, late), callback)
+        return handle
+
+    scheduler = TimerScheduler(arm, lambda handle: pending.pop(handle, None), clock=lambda: now)
+    timer = CountdownTimer(scheduler.clock, fraction_digits)
+    seconds = hours * 3600
+    ticks = 0
+    worst = 0.0
+    shown = None
+    expired_at = None
+
+    def on_update(timer):
+        nonlocal ticks, worst, shown
+        ticks += 1
+        if timer.time_left != shown:
+            shown = timer.time_left
+            worst = max(worst, now - (seconds - shown))  # second n should show up at seconds - n
+    timer.listeners.append(on_update)
+
+    def on_expire(timer):
+        nonlocal expired_at
+        expired_at = now
+    timer.expire_listeners.append(on_expire)
+
+    timer.start(seconds)
+    scheduler.schedule(timer)
+    while pending:
+        handle = min(pending, key=lambda handle: pending[handle][0])
+        now, callback = pending.pop(handle)
+        callback()
+    return ticks, worst, expired_at - seconds
+
+
+def bench_tick():
+    """Nanoseconds per tick of the scheduler and timer, plus the worst drift in milliseconds"""
+    ticks, _, _ = simulate_timer()
+    overhead = per_call(simulate_timer, ticks)
+    _, worst, late = simulate_timer()
+    return overhead, max(worst, late) * 1000
+
+
+def bench_import():
+    """Milliseconds to import app in a fresh interpreter, the best of five"""
+    return min(import_times('app')['app'] for _ in range(5)) / 1000
+
+
+def run_suite():
+    """Returns a dict of metric name -> value"""
+    results = {}
+    for kind, weeks in RULES.items():
+        results[f'meetup_{kind}_ns'] = bench_meetup(weeks)
+    results['meetup_fifth_missing_ns'] = bench_fifth_missing()
+    results['tick_ns'], results['tick_drift_ms'] = bench_tick()
+    results['import_app_ms'] = bench_import()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints each metric against its baseline
+
+    :return list[str]: the metrics that are more than threshold slower than their baseline
+    """
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            print(f'{name:>24}: {value:12.3f}  (no baseline)')
+            continue
+        before = baseline[name]
+        change = (value - before) / before if before else 0.0
+        regressed = value > before * (1 + threshold) and value - before > 1e-9
+        print(f'{name:>24}: {value:12.3f}  baseline {before:12.3f}  {change:+7.1%}' + ('  REGRESSION' if regressed else ''))
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths against a saved baseline.')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='the baseline file, benchmarks/baseline.json if not given')
+    parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='how much slower counts as a regression, 0.25 is 25%%')
+    parser.add_argument('--retries', type=int, default=2, help='how many times to rerun before calling it a regression')
+    args = parser.parse_args(argv)
+
+    results = run_suite()
+    if args.save:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        for name, value in results.items():
+            print(f'{name:>24}: {value:12.3f}')
+        print(f'saved to {args.baseline}')
+        return 0
+
+    try:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    except FileNotFoundError:
+        sys.exit(f'no baseline at {args.baseline}, run with --save first')
+    regressions = compare(results, baseline, args.threshold)
+    for _ in range(args.retries):
+        if not regressions:
+            break
+        print(f'measuring again: {", ".join(regressions)}')
+        again = run_suite()
+        results = {name: min(value, again[name]) for name, value in results.items()}
+        regressions = compare({name: results[name] for name in regressions}, baseline, args.threshold)
+    if regressions:
+        print(f'{len(regressions)} regression(s): {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Resolves meetup descriptions in bulk from the command line
+
+Reads rows like 2022,January,First,Monday (or JSON lines with year, month, week and day_of_week, or
+free text like "1st Monday of January 2022") from a file or stdin and writes each row back with its
+ISO date. Rows that can't be resolved get their error inline instead of stopping the run. Input is
+read in chunks so memory stays bounded however big the file is, and with --jobs the chunks are
+resolved by a pool of processes while the output stays in input order.
+
+    python app.py resolve [--format csv|jsonl|text] [--jobs N] [--chunk-size N] [file]
+"""
+import argparse
+import calendar
+import collections
+import csv
+import io
+import itertools
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from core import MeetupDate, MeetupDayException
+
+MONTHS = {name: number for number, name in enumerate(calendar.month_name) if name}
+
+
+def parse_month(month):
+    """Returns the month number of a month name or number
+
+    :param month: January - December, or 1 - 12
+    """
+    if month in MONTHS:
+        return MONTHS[month]
+    try:
+        number = int(month)
+    except ValueError:
+        number = 0
+    if not 1 <= number <= 12:
+        raise ValueError(f'{month} is not a month')
+    return number
+
+
+def resolve(year, month, week, day_of_week):
+    """Resolves one row to an ISO date
+
+    :return tuple[str, str]: the date and an empty error, or an empty date and the error
+    """
+    try:
+        return MeetupDate.meetup(int(year), parse_month(month), week, day_of_week).isoformat(), ''
+    except MeetupDayException as error:
+        return '', error.message
+    except KeyError as error:
+        return '', f'unknown name {error}'
+    except (TypeError, ValueError) as error:
+        return '', str(error)
+
+
+def resolve_csv(lines):
+    """Resolves a chunk of CSV lines, adding the date and error columns to each row
+
+    :param lines: the lines of the chunk
+    :return str: the output for the chunk
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    for row in csv.reader(lines):
+        if not row:
+            continue
+        if len(row) != 4:
+            writer.writerow(row + ['', 'expected year,month,week,day_of_week'])
+            continue
+        writer.writerow(row + list(resolve(*row)))
+    return output.getvalue()
+
+
+def resolve_jsonl(lines):
+    """Resolves a chunk of JSON lines, adding date and error keys to each object
+
+    :param lines: the lines of the chunk
+    :return str: the output for the chunk
+    """
+    output = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            meetup, error = resolve(row['year'], row['month'], row['week'], row['day_of_week'])
+        except (ValueError, KeyError, TypeError) as parse_error:
+            row, meetup, error = {'input': line.rstrip('\n')}, '', f'bad row: {parse_error}'
+        row['date'] = meetup or None
+        row['error'] = error or None
+        output.append(json.dumps(row))
+        output.append('\n')
+    return ''.join(output)
+
+
+def resolve_text(lines):
+    """Resolves a chunk of free text descriptions, writing each as a CSV row with its date and error
+
+    :param lines: the lines of the chunk
+    :return str: the output for the chunk
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    for text, meetup, error in MeetupDate.parse_lines(lines):
+        writer.writerow([text, meetup.isoformat() if meetup else '', error])
+    return output.getvalue()
+
+
+RESOLVERS = {'csv': resolve_csv, 'jsonl': resolve_jsonl, 'text': resolve_text}
+
+
+def chunked(lines, size):
+    """Splits lines into lists of at most size lines"""
+    lines = iter(lines)
+    return iter(lambda: list(itertools.islice(lines, size)), [])
+
+
+def ordered_map(executor, function, chunks, window):
+    """Maps function over chunks on executor, yielding results in order
+
+    At most window chunks are in flight at once, so a huge input is never read ahead into memory.
+    """
+    pending = collections.deque()
+    for chunk in chunks:
+        pending.append(executor.submit(function, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='app.py resolve', description='Resolve meetup descriptions to dates.')
+    parser.add_argument('file', nargs='?', default='-', help='the rows to resolve, stdin if not given')
+    parser.add_argument('--format', choices=RESOLVERS, default='csv', help='csv (the default), jsonl or text')
+    parser.add_argument('--jobs', type=int, default=1, help='resolve chunks in this many processes')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows per chunk')
+    args = parser.parse_args(argv)
+
+    resolver = RESOLVERS[args.format]
+    source = sys.stdin if args.file == '-' else open(args.file, newline='')
+    try:
+        chunks = chunked(source, args.chunk_size)
+        if args.jobs > 1:
+            with ProcessPoolExecutor(args.jobs) as executor:
+                for output in ordered_map(executor, resolver, chunks, args.jobs * 2):
+                    sys.stdout.write(output)
+        else:
+            for chunk in chunks:
+                sys.stdout.write(resolver(chunk))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1261 @@
+"""The parts of the countdown timer that don't need a GUI
+
+Finds actual meet up date based on a date description
+For example, if given "1st Monday of January 2022", the correct meetup date is January 3, 2022.
+
+The countdown timers are driven by one shared scheduler. Nothing in here imports tkinter, the GUI hands
+the scheduler its widget's after() and after_cancel(), and the Tk frames only draw what the timers tell them.
+"""
+import calendar
+import collections
+import datetime
+import functools
+import heapq
+import itertools
+import math
+import re
+import time
+from array import array
+from bisect import bisect_right
+from datetime import date
+from zoneinfo import ZoneInfo
+
+
+# subclassing the built-in ValueError to create MeetupDayException
+class MeetupDayException(ValueError):
+    """Exception raised when the Meetup weekday and count do not result in a valid date.
+
+    message: explanation of the error.
+
+    """
+    def __init__(self, message):
+        self.message = message
+
+
+class MeetupDate:
+    """Finds actual meet up date based on a date description
+
+    For example, if given "1st Monday of January 2022", the correct meetup date is January 3, 2022.
+    """
+
+    occurrences = {'First': 1, 'Second': 2, 'Third': 3, 'Fourth': 4, 'Fifth': 5, 'Teenth': 13, 'Last': 99}
+    days_of_week = {'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3, 'Thursday': 4, 'Friday': 5, 'Saturday': 6}
+
+    @staticmethod
+    def find_last_occurrence(year, month, week_day):
+        """Finds the last occurrence of week_day in the month
+
+        :param year: the year of the meetup
+        :param month: the month of the meetup
+        :param week_day: the last
+        :return datetime.date: The date of the last meetup week_day
+        """
+
+        # create a calendar to work with
+        my_calendar = calendar.Calendar(calendar.SUNDAY)
+
+        # A 2d list that contains the days of the month in their proper positions in the week
+        weeks = my_calendar.monthdayscalendar(year, month)
+
+        for week in weeks[::-1]:  # reverse the weeks to find the last occurrence
+            if week[week_day] != 0:  # the first time this is not zero is the last occurrence
+                return date(year, month, week[week_day])
+
+    @staticmethod
+    def find_teenth_occurrence(year, month, week_day):
+        """Finds the week_day in teens of the month. Their are 7 days in the range 13-19
+
+        :param year: the year of the meetup
+        :param month: the month of the meetup
+        :param week_day: the day of the week that the meetup will occur
+        :return datetime.date: The actual date of the meetup
+        """
+
+        # create a calendar to work with
+        my_calendar = calendar.Calendar(calendar.SUNDAY)
+
+        # A 2d list that contains the days of the month in their proper positions in the week
+        weeks = my_calendar.monthdayscalendar(year, month)
+
+        # search through the weeks until we find a day of the week with a day of the month in the teens
+        for week in weeks:
+            if 13 <= week[week_day] <= 19:
+                return date(year, month, week[week_day])
+
+    @staticmethod
+    def find_nth_occurrence(year, month, week_day, occurrence):
+        """Finds the nth week_day of the month
+
+        :param year: The year of the meetup
+        :param month: The month of the meetup
+        :param week_day: The day of the week for the meetup
+        :param occurrence: The nth occurrence of the day of the week
+        :return datetime.date: The actual date of the meetup
+        """
+
+        # create a calendar to work with
+        my_calendar = calendar.Calendar(calendar.SUNDAY)
+
+        # A 2d list that contains the days of the month in their proper positions in the week
+        weeks = my_calendar.monthdayscalendar(year, month)
+
+        # a counter to keep track of how many the day of the week we have seen so far
+        count = 0
+        for week in weeks:
+            if week[week_day] != 0:
+                count += 1
+                if count == occurrence:  # nth occurrence?
+                    return date(year, month, week[week_day])
+        raise MeetupDayException('That day does not exist.')
+
+    @staticmethod
+    def find_occurrence(year, month, week_day, occurrence):
+        """Finds the meetup date arithmetically, without building a calendar
+
+        Gives the same answers as find_nth_occurrence, find_teenth_occurrence and find_last_occurrence
+        using only the weekday of the first of the month and the length of the month.
+
+        :param year: The year of the meetup
+        :param month: The month of the meetup
+        :param week_day: The day of the week for the meetup (0 is Sunday)
+        :param occurrence: The nth occurrence of the day of the week, 13 for teenth or 99 for last
+        :return datetime.date: The actual date of the meetup
+        """
+
+        # monthrange counts Monday as 0, our week starts on Sunday
+        first_week_day, days_in_month = calendar.monthrange(year, month)
+        first_week_day = (first_week_day + 1) % 7
+
+        if occurrence == 99:  # the last occurrence, count back from the end of the month
+            last_week_day = (first_week_day + days_in_month - 1) % 7
+            return date(year, month, days_in_month - (last_week_day - week_day) % 7)
+
+        if occurrence == 13:  # the teenth day, the 13th is 12 days after the 1st
+            return date(year, month, 13 + (week_day - first_week_day - 12) % 7)
+
+        # the first through fifth occurrence
+        day = 1 + (week_day - first_week_day) % 7 + (occurrence - 1) * 7
+        if occurrence < 1 or day > days_in_month:
+            raise MeetupDayException('That day does not exist.')
+        return date(year, month, day)
+
+    @staticmethod
+    def meetup(year, month, week, day_of_week=None):
+        """Calculate the next occurrence of meetup date
+        :param year: The year to start looking for the next meetup
+        :param month: The month to start looking for the next meetup
+        :param week: The week of the meetup (first, second, third, fourth, fifth, teenth, last)
+        teenth is the days from 13 - 19, or a MeetupRule
+        :param day_of_week: The weekday name, left out when week is a MeetupRule
+        """
+        if isinstance(week, MeetupRule):  # already parsed
+            return week.resolve(year, month)
+
+        # occurrences = {'first': 1, 'second': 2, 'third': 3, 'fourth': 4, 'fifth': 5, 'teenth': 13, 'last': 99}
+        # days_of_week = {'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3, 'Thursday': 4, 'Friday': 5, 'Saturday': 6}
+        occurrence = MeetupDate.occurrences[week]
+        week_day = MeetupDate.days_of_week[day_of_week]
+
+        return MeetupDate.find_occurrence(year, month, week_day, occurrence)
+
+    @staticmethod
+    def parse(text, default_year=None):
+        """Calculate the meetup date of a description such as "1st Monday of January 2022"
+
+        :param text: the description, see parse_description for what it may look like
+        :param default_year: the year when the description has none, this year if not given
+        :return datetime.date: The actual date of the meetup
+        """
+        rule, month, year = parse_description(text)
+        if year is None:
+            year = default_year if default_year is not None else date.today().year
+        return MeetupDate.meetup(year, month, rule)
+
+    @staticmethod
+    def parse_lines(lines, default_year=None):
+        """Calculates the meetup date of every description in a stream of lines, skipping blank ones
+
+        :param lines: an iterable of descriptions, one per line
+        :param default_year: the year when a description has none, this year if not given
+        :return: a generator of (description, date, error), with date None and the error set when the
+            line couldn't be parsed or the day doesn't exist
+        """
+        if default_year is None:
+            default_year = date.today().year
+        for line in lines:
+            text = line.strip()
+            if not text:
+                continue
+            try:
+                yield text, MeetupDate.parse(text, default_year), ''
+            except MeetupDayException as error:
+                yield text, None, error.message
+            except ValueError as error:
+                yield text, None, str(error)
+
+    @staticmethod
+    def _codes(names, table):
+        """Maps an array of occurrence or weekday names to their numeric codes
+
+        :param names: a sequence of names, or of codes which are passed through as they are
+        :param table: MeetupDate.occurrences or MeetupDate.days_of_week
+        :return numpy.ndarray: the int64 codes
+        """
+        import numpy as np
+
+        names = np.asarray(names)
+        if names.dtype.kind in 'iu':  # already codes
+            return names.astype(np.int64)
+
+        # look each distinct name up once instead of once per row
+        unique_names, inverse = np.unique(names, return_inverse=True)
+        codes = np.array([table[str(name)] for name in unique_names], dtype=np.int64)
+        return codes[inverse].reshape(names.shape)
+
+    @staticmethod
+    def meetup_many(years, months, weeks, days_of_week=None):
+        """Calculate many meetup dates at once with NumPy
+
+        The arguments are broadcast against each other, so a single rule can be applied to many months.
+        Rows whose day does not exist (a missing fifth occurrence), whose month is not 1 - 12 or whose year
+        is not 1 - 9999 are NaT and marked invalid in the mask instead of raising.
+
+        :param years: The years of the meetups
+        :param months: The months of the meetups (1 - 12)
+        :param weeks: The weeks of the meetups, keys of occurrences or their values, or MeetupRules
+        :param days_of_week: The weekday names, keys of days_of_week or their values, left out for MeetupRules
+        :return tuple[numpy.ndarray, numpy.ndarray]: the datetime64[D] dates and the boolean validity mask
+        """
+        try:
+            import numpy as np
+        except ImportError:  # an optional dependency, only this needs it
+            raise ImportError('meetup_many needs NumPy, install it with pip install numpy') from None
+
+        years = np.asarray(years, dtype=np.int64)
+        months = np.asarray(months, dtype=np.int64)
+        if days_of_week is None:  # weeks holds MeetupRules
+            rules = np.asarray(weeks, dtype=object)
+            occurrence = np.array([rule.occurrence for rule in rules.flat], dtype=np.int64).reshape(rules.shape)
+            week_day = np.array([rule.week_day for rule in rules.flat], dtype=np.int64).reshape(rules.shape)
+        else:
+            occurrence = MeetupDate._codes(weeks, MeetupDate.occurrences)
+            week_day = MeetupDate._codes(days_of_week, MeetupDate.days_of_week)
+        years, months, occurrence, week_day = np.broadcast_arrays(years, months, occurrence, week_day)
+
+        # the first of each month and the first of the following month
+        month_start = ((years - 1970) * 12 + months - 1).astype('datetime64[M]')
+        first = month_start.astype('datetime64[D]')
+        days_in_month = ((month_start + 1).astype('datetime64[D]') - first).astype(np.int64)
+
+        # 1970-01-01 was a Thursday, which is 4 when the week starts on Sunday
+        first_week_day = (first.astype(np.int64) + 4) % 7
+
+        # the same arithmetic as find_occurrence, one column at a time
+        day = 1 + (week_day - first_week_day) % 7 + (occurrence - 1) * 7
+        day = np.where(occurrence == 13, 13 + (week_day - first_week_day - 12) % 7, day)
+        last_week_day = (first_week_day + days_in_month - 1) % 7
+        day = np.where(occurrence == 99, days_in_month - (last_week_day - week_day) % 7, day)
+
+        # a month outside 1 - 12 would roll into the next or previous year and a year outside 1 - 9999
+        # can't be a datetime.date, so they are invalid instead
+        valid = (day >= 1) & (day <= days_in_month) & (months >= 1) & (months <= 12)
+        valid &= (years >= 1) & (years <= 9999)
+        dates = np.where(valid, first + (day - 1), np.datetime64('NaT', 'D'))
+        return dates, valid
+
+
+class MeetupRule:
+    """A meetup rule such as "Teenth Thursday", parsed once
+
+    Rules are interned, MeetupRule('Last', 'Friday') always returns the same object, so there are never
+    more than 49 of them and they compare and hash by identity. Each one carries a resolver with its
+    occurrence and weekday already looked up, rule.resolve(year, month) gives the meetup date.
+    """
+
+    __slots__ = ('week', 'day_of_week', 'occurrence', 'week_day', 'index', 'resolve')
+    _interned = {}
+
+    def __new__(cls, week, day_of_week):
+        """Returns the rule for week and day_of_week
+
+        :param week: The week of the meetup (first, second, third, fourth, fifth, teenth, last)
+        :param day_of_week: The weekday name
+        """
+        rule = cls._interned.get((week, day_of_week))
+        if rule is not None:
+            return rule
+
+        occurrence = MeetupDate.occurrences[week]
+        week_day = MeetupDate.days_of_week[day_of_week]
+        rule = super().__new__(cls)
+        for name, value in (
+            ('week', week),
+            ('day_of_week', day_of_week),
+            ('occurrence', occurrence),
+            ('week_day', week_day),
+            # the position of the rule among all 49, in the order of occurrences and days_of_week
+            ('index', list(MeetupDate.occurrences).index(week) * 7 + week_day),
+            ('resolve', functools.partial(MeetupDate.find_occurrence, week_day=week_day, occurrence=occurrence)),
+        ):
+            object.__setattr__(rule, name, value)
+        cls._interned[(week, day_of_week)] = rule
+        return rule
+
+    @classmethod
+    def parse(cls, text):
+        """Returns the rule for text such as "Teenth Thursday" """
+        week, day_of_week = text.split()
+        return cls(week, day_of_week)
+
+    @classmethod
+    def coerce(cls, week, day_of_week=None):
+        """Returns week if it is already a rule, otherwise the rule for week and day_of_week"""
+        if isinstance(week, cls):
+            return week
+        return cls(week, day_of_week)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('MeetupRule is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('MeetupRule is immutable')
+
+    def __reduce__(self):
+        # unpickling goes back through __new__, so rules stay interned in other processes
+        return MeetupRule, (self.week, self.day_of_week)
+
+    def __repr__(self):
+        return f'MeetupRule({self.week!r}, {self.day_of_week!r})'
+
+    def __str__(self):
+        return f'{self.week} {self.day_of_week}'
+
+
+MeetupDescription = collections.namedtuple('MeetupDescription', ['rule', 'month', 'year'])  # year None if not given
+
+# the spellings parse_description understands, in lower case
+_ORDINALS = {'1st': 'First', '2nd': 'Second', '3rd': 'Third', '4th': 'Fourth', '5th': 'Fifth'}
+_ORDINALS.update((name.lower(), name) for name in MeetupDate.occurrences)
+_WEEKDAYS = {'tues': 'Tuesday', 'thur': 'Thursday', 'thurs': 'Thursday'}
+_WEEKDAYS.update((name[:length].lower(), name) for name in MeetupDate.days_of_week for length in (3, len(name)))
+_MONTHS = {'sept': 9}
+_MONTHS.update((name.lower(), number) for number, name in enumerate(calendar.month_name) if name)
+_MONTHS.update((name.lower(), number) for number, name in enumerate(calendar.month_abbr) if name)
+
+
+def _alternatives(names):
+    """Returns a regex alternation of names, longest first so "thurs" isn't matched as "thu" """
+    return '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+
+
+_DESCRIPTION = re.compile(
+    rf'(?:the\s+)?(?P<week>{_alternatives(_ORDINALS)})\s+(?P<day>{_alternatives(_WEEKDAYS)})\.?'
+    rf'(?:\s+(?:of|in))?\s+(?P<month>{_alternatives(_MONTHS)}|1[0-2]|0?[1-9])\.?'
+    r'(?:(?:\s*[,/]\s*|\s+)(?P<year>\d{4}))?',
+    re.IGNORECASE,
+)
+
+
+def parse_description(text):
+    """Parses a meetup description such as "1st Monday of January 2022" or "last fri mar"
+
+    Case and spacing don't matter. The week may be an ordinal (1st - 5th, first - fifth), last or
+    teenth, the weekday its full name or abbreviation, the month its name, abbreviation or number,
+    and the year is optional. Results are cached under the lower cased text with its spaces
+    collapsed, so a description seen before, however it was typed, costs one dictionary lookup.
+
+    :param text: the description
+    :return MeetupDescription: the rule, month and year
+    """
+    return _parse_normalized(' '.join(text.lower().split()))
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_normalized(text):
+    """parse_description for text that is already lower case with single spaces"""
+    match = _DESCRIPTION.fullmatch(text)
+    if match is None:
+        raise ValueError(f'{text!r} is not a meetup description')
+    week, day, month, year = match.group('week', 'day', 'month', 'year')
+    return MeetupDescription(
+        MeetupRule(_ORDINALS[week], _WEEKDAYS[day]),
+        int(month) if month.isdigit() else _MONTHS[month],
+        int(year) if year is not None else None,
+    )
+
+
+MeetupCacheInfo = collections.namedtuple('MeetupCacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+
+class MeetupCache:
+    """A bounded least recently used cache in front of MeetupDate.meetup
+
+    The Gregorian calendar repeats exactly every 400 years, so the day of the month is stored under
+    year % 400 and shared by every year in the same position of the cycle.
+    """
+
+    def __init__(self, maxsize=1024):
+        """Create an empty cache
+
+        :param maxsize: the most answers to keep before evicting the least recently used one
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._days = collections.OrderedDict()  # 0 means the day does not exist
+
+    def meetup(self, year, month, week, day_of_week=None):
+        """Calculate the meetup date the same way as MeetupDate.meetup, using the cache
+
+        :param year: The year of the meetup
+        :param month: The month of the meetup
+        :param week: The week of the meetup (first, second, third, fourth, fifth, teenth, last), or a MeetupRule
+        :param day_of_week: The weekday name, left out when week is a MeetupRule
+        :return datetime.date: The actual date of the meetup
+        """
+        rule = MeetupRule.coerce(week, day_of_week)
+        key = (year % 400, month, rule)
+        day = self._days.get(key)
+        if day is None:
+            self.misses += 1
+            try:
+                day = rule.resolve(year, month).day
+            except MeetupDayException:
+                day = 0
+            self._days[key] = day
+            if len(self._days) > self.maxsize:
+                self._days.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            self._days.move_to_end(key)
+
+        if not day:
+            raise MeetupDayException('That day does not exist.')
+        return date(year, month, day)
+
+    def cache_info(self):
+        """Returns the hit, miss and eviction counters along with the size of the cache"""
+        return MeetupCacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._days))
+
+    def clear(self):
+        """Empties the cache and resets the counters"""
+        self._days.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class MeetupSchedule:
+    """Lazily generates every occurrence of a meetup rule from a start date onward
+
+    For example, MeetupSchedule('Teenth', 'Thursday', date(2022, 1, 1)) yields January 13, 2022,
+    February 17, 2022, March 17, 2022 and so on. Months where a fifth occurrence does not exist are skipped.
+    """
+
+    def __init__(self, week, day_of_week=None, start=None):
+        """Create a schedule for a meetup rule
+
+        :param week: The week of the meetup (first, second, third, fourth, fifth, teenth, last), or a MeetupRule
+        :param day_of_week: The weekday name, left out when week is a MeetupRule
+        :param start: The first date to consider, today if not given
+        """
+        self.rule = MeetupRule.coerce(week, day_of_week)
+        self.seek(start if start is not None else date.today())
+
+    def seek(self, start):
+        """Moves the schedule so the next occurrence is the first one on or after start
+
+        :param start: the date to jump to
+        :return MeetupSchedule: this schedule, so calls can be chained
+        """
+        self.start = start
+        self.year = start.year
+        self.month = start.month
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self.year <= datetime.MAXYEAR:
+            year, month = self.year, self.month
+
+            # move on to the next month before we try this one
+            if month == 12:
+                self.year, self.month = year + 1, 1
+            else:
+                self.month = month + 1
+
+            try:
+                meetup = self.rule.resolve(year, month)
+            except MeetupDayException:  # no fifth occurrence this month
+                continue
+            if meetup >= self.start:  # only the first month can be before the start
+                return meetup
+        raise StopIteration
+
+    def take(self, count):
+        """Returns the next count occurrences
+
+        :param count: how many occurrences to return
+        :return list[datetime.date]: the meetup dates
+        """
+        return list(itertools.islice(self, count))
+
+    def between(self, start, end):
+        """Generates the occurrences from start to end, inclusive
+
+        :param start: the first date to consider
+        :param end: the last date to consider
+        """
+        for meetup in self.seek(start):
+            if meetup > end:
+                return
+            yield meetup
+
+
+class MeetupRegistry:
+    """Answers "which groups meet on this date" without checking every group's rule
+
+    Groups are indexed by the occurrence and weekday of their rule. A date can only match the rules for
+    its own weekday and its nth occurrence, plus teenth and last when it falls in those days, so a query
+    looks up at most three entries however many groups are registered.
+    """
+
+    def __init__(self):
+        self._rules = {}  # group -> MeetupRule
+        self._index = collections.defaultdict(dict)  # (occurrence, week_day) -> groups, kept in order
+
+    def __len__(self):
+        return len(self._rules)
+
+    def register(self, group, week, day_of_week=None):
+        """Adds group to the registry, replacing any rule it already has
+
+        :param group: anything hashable that identifies the group
+        :param week: The week of the meetup (first, second, third, fourth, fifth, teenth, last), or a MeetupRule
+        :param day_of_week: The weekday name, left out when week is a MeetupRule
+        """
+        self.unregister(group)
+        rule = MeetupRule.coerce(week, day_of_week)
+        self._rules[group] = rule
+        self._index[rule.occurrence, rule.week_day][group] = None
+
+    def unregister(self, group):
+        """Removes group from the registry if it is there"""
+        rule = self._rules.pop(group, None)
+        if rule is not None:
+            groups = self._index[rule.occurrence, rule.week_day]
+            del groups[group]
+            if not groups:
+                del self._index[rule.occurrence, rule.week_day]
+
+    def rule(self, group):
+        """Returns the MeetupRule group was registered with"""
+        return self._rules[group]
+
+    def on(self, day, days_in_month=None):
+        """Returns the groups that meet on day
+
+        :param day: the date to look up
+        :param days_in_month: the length of day's month, looked up if not given
+        :return list: the groups, in the order they were registered within each rule
+        """
+        if days_in_month is None:
+            days_in_month = calendar.monthrange(day.year, day.month)[1]
+        week_day = (day.weekday() + 1) % 7  # our week starts on Sunday
+
+        # the same classes of day as find_nth_occurrence, find_teenth_occurrence and find_last_occurrence
+        occurrences = [(day.day - 1) // 7 + 1]
+        if 13 <= day.day <= 19:
+            occurrences.append(13)
+        if day.day + 7 > days_in_month:
+            occurrences.append(99)
+
+        groups = []
+        for occurrence in occurrences:
+            groups.extend(self._index.get((occurrence, week_day), ()))
+        return groups
+
+    def between(self, start, end):
+        """Generates (date, group) for every meetup from start to end, inclusive, in date order
+
+        :param start: the first date to consider
+        :param end: the last date to consider
+        """
+        day = start
+        one_day = datetime.timedelta(days=1)
+        days_in_month = None
+        while day <= end:
+            if days_in_month is None or day.day == 1:
+                days_in_month = calendar.monthrange(day.year, day.month)[1]
+            for group in self.on(day, days_in_month):
+                yield day, group
+            if day == date.max:
+                return
+            day += one_day
+
+
+class CountdownTimer:
+    """Counts down to a deadline on the monotonic clock
+
+    Every time the scheduler ticks the timer it updates time_left and calls each of the listeners
+    with the timer, so views can redraw themselves. With fraction_digits set the timer also counts
+    tenths or hundredths of a second, but only while it is visible, a hidden timer just wakes up
+    when it runs out. The expire_listeners are called once, on the tick that reaches zero.
+    """
+
+    def __init__(self, clock=time.monotonic, fraction_digits=0):
+        """Create a stopped timer
+
+        :param clock: a function returning the current time in seconds, time.monotonic by default
+        :param fraction_digits: how many digits of the seconds to count, 0, 1 or 2
+        """
+        self.clock = clock
+        self.listeners = []
+        self.expire_listeners = []
+        self.visible = True
+        self.set_fraction_digits(fraction_digits)
+        self.reset()
+
+    def set_fraction_digits(self, digits):
+        """Changes how finely the timer counts
+
+        :param digits: 0 for whole seconds, 1 for tenths or 2 for hundredths
+        """
+        if digits not in (0, 1, 2):
+            raise ValueError('fraction_digits must be 0, 1 or 2')
+        self.fraction_digits = digits
+        self.per_second = 10 ** digits
+
+    def reset(self):
+        """Resets the timer back to it's initial condition"""
+        self.time_left = 0
+        self.units_left = 0  # time left in tenths or hundredths when counting fractions
+        self.paused = False
+        self.running = False
+        self.expired = False
+
+        # the countdown is measured against the clock so late callbacks don't add up
+        self.deadline = 0.0
+        self.paused_at = None
+        self.paused_total = 0.0
+
+    def start(self, seconds):
+        """Starts counting down
+
+        :param seconds: the length of the countdown
+        """
+        self.reset()
+        self.running = True
+        self.time_left = seconds
+        self.units_left = seconds * self.per_second
+        self.deadline = self.clock() + seconds
+
+    def start_until(self, deadline):
+        """Starts counting down to a deadline on the timer's clock
+
+        :param deadline: when the timer runs out, in the clock's seconds
+        """
+        self.reset()
+        self.running = True
+        self.deadline = deadline
+        remaining = self.remaining()
+        self.time_left = math.ceil(round(remaining, 6))
+        self.units_left = math.ceil(round(remaining * self.per_second, 6))
+
+    def toggle_pause(self):
+        """Toggles the paused flag, keeping track of how long the timer has been paused"""
+        if self.paused:
+            self.paused_total += self.clock() - self.paused_at
+            self.paused_at = None
+        else:
+            self.paused_at = self.clock()
+        self.paused = not self.paused
+
+    def stop(self):
+        """Stops the timer straight away and lets the listeners know"""
+        self.reset()
+        self.notify()
+
+    def remaining(self, now=None):
+        """Returns the seconds left on the timer, measured from the deadline
+
+        :param now: the current time on the timer's clock, read from the clock if not given
+        """
+        if self.paused:
+            now = self.paused_at
+        elif now is None:
+            now = self.clock()
+        return max(0.0, self.deadline + self.paused_total - now)
+
+    def get_HMS(self):
+        """Returns a tuple (hours, minutes, seconds)"""
+        seconds = self.time_left
+        hours = seconds // 3600
+        seconds -= hours * 3600
+        minutes = seconds // 60
+        seconds -= minutes * 60
+        return hours, minutes, seconds
+
+    def get_HMSF(self):
+        """Returns a tuple (hours, minutes, seconds, fraction) counted in units of fraction_digits"""
+        seconds, fraction = divmod(self.units_left, self.per_second)
+        hours, seconds = divmod(seconds, 3600)
+        minutes, seconds = divmod(seconds, 60)
+        return hours, minutes, seconds, fraction
+
+    def notify(self):
+        """Calls every listener with this timer"""
+        for listener in self.listeners:
+            listener(self)
+
+    def tick(self, now):
+        """Updates the time left
+
+        :param now: the current time on the timer's clock
+        :return float: when the timer next needs a tick, None when it is paused, stopped or finished
+        """
+        if self.paused or not self.running:  # nothing changes until it is resumed or started
+            return None
+
+        remaining = self.remaining(now)
+        self.time_left = math.ceil(round(remaining, 6))
+        # rounded first so float error can't push an exact boundary up to the next unit
+        self.units_left = math.ceil(round(remaining * self.per_second, 6))
+        self.notify()
+        if remaining <= 0:
+            if not self.expired:
+                self.expired = True
+                for listener in self.expire_listeners:
+                    listener(self)
+            return None
+        if not self.visible:  # nobody is looking, just wake up when it runs out
+            return now + remaining
+        # wake up when the visible digit next changes
+        return now + remaining - (self.units_left - 1) / self.per_second
+
+
+def add_months(moment, months):
+    """Returns moment moved by a number of months, clamped to the end of shorter months
+
+    :param moment: a datetime.date or datetime.datetime
+    :param months: how many months to move, may be negative
+    """
+    month_index = moment.year * 12 + moment.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return moment.replace(year=year, month=month, day=min(moment.day, calendar.monthrange(year, month)[1]))
+
+
+def calendar_difference(start, end):
+    """Returns the calendar difference between two datetimes
+
+    :return tuple: (years, months, days, seconds), where seconds is a float of the time left over
+        after adding the years, months and days to start
+    """
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if add_months(start, months) > end:
+        months -= 1
+    rest = end - add_months(start, months)
+    return months // 12, months % 12, rest.days, rest.seconds + rest.microseconds / 1e6
+
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class ZoneTransitions:
+    """The UTC offsets of an IANA time zone, found once and bisected afterwards
+
+    Converting between timestamps and local time in the zone is then a bisect of a sorted list instead
+    of a trip through astimezone(). Times outside the years the table covers fall back to zoneinfo.
+    """
+
+    _zones = {}  # name -> ZoneTransitions, so each zone is only scanned once
+
+    @classmethod
+    def get(cls, name):
+        """Returns the shared table for the zone called name"""
+        zone = cls._zones.get(name)
+        if zone is None:
+            zone = cls._zones[name] = cls(name)
+        return zone
+
+    def __init__(self, name, first_year=None, last_year=None):
+        """Scan the zone for offset changes
+
+        :param name: the IANA name of the zone, such as America/Chicago
+        :param first_year: the first year to cover, last year if not given
+        :param last_year: the last year to cover, ten years from now if not given
+        """
+        this_year = date.today().year
+        first_year = this_year - 1 if first_year is None else first_year
+        last_year = this_year + 10 if last_year is None else last_year
+        self.name = name
+        self.zone = ZoneInfo(name)
+        self.first = datetime.datetime(first_year, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+        self.last = datetime.datetime(last_year + 1, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+
+        # starts[i] is the timestamp offsets[i] takes effect, the zone changes at most a few times a year
+        # so stepping a day at a time and then bisecting down to the second finds every change
+        self.starts = [self.first]
+        self.offsets = [self._zone_offset(self.first)]
+        step = 86400
+        moment = self.first
+        while moment < self.last:
+            following = min(moment + step, self.last)
+            offset = self._zone_offset(following)
+            if offset != self.offsets[-1]:
+                low, high = moment, following  # the change is in (low, high]
+                while high - low > 1:
+                    middle = (low + high) // 2
+                    if self._zone_offset(middle) == offset:
+                        high = middle
+                    else:
+                        low = middle
+                self.starts.append(high)
+                self.offsets.append(offset)
+            moment = following
+
+    def _zone_offset(self, timestamp):
+        """Asks zoneinfo for the UTC offset in seconds at timestamp"""
+        return int(datetime.datetime.fromtimestamp(timestamp, self.zone).utcoffset().total_seconds())
+
+    def _index(self, timestamp):
+        """Returns the index of the offset in effect at timestamp"""
+        return bisect_right(self.starts, timestamp) - 1
+
+    def offset(self, timestamp):
+        """Returns the UTC offset in seconds at timestamp"""
+        if not self.first <= timestamp < self.last:
+            return self._zone_offset(timestamp)
+        return self.offsets[self._index(timestamp)]
+
+    def next_transition(self, timestamp):
+        """Returns the timestamp of the next offset change after timestamp, None if there isn't one"""
+        index = self._index(timestamp) + 1
+        if 0 < index < len(self.starts):
+            return self.starts[index]
+        return None
+
+    def to_local(self, timestamp):
+        """Returns the naive local datetime in the zone at timestamp"""
+        return EPOCH + datetime.timedelta(seconds=timestamp + self.offset(timestamp))
+
+    def to_timestamp(self, local):
+        """Returns the timestamp of a naive local datetime in the zone
+
+        Like fold=0, a time that happens twice is the first one, and a time skipped by a change
+        is taken with the offset from before the change.
+        """
+        seconds = (local - EPOCH).total_seconds()
+        if not self.first <= seconds < self.last:
+            return local.replace(tzinfo=self.zone).timestamp()
+
+        guess = self._index(seconds - self.offsets[self._index(seconds)])
+        skipped = None
+        for index in (guess - 1, guess, guess + 1):
+            if not 0 <= index < len(self.offsets):
+                continue
+            timestamp = seconds - self.offsets[index]
+            actual = self._index(timestamp)
+            if actual == index:
+                return timestamp
+            if actual > index:  # in a gap, the latest offset from before the change wins
+                skipped = timestamp
+        return skipped
+
+
+class CalendarCountdown:
+    """Counts down years, months, days, hours, minutes and seconds to a target datetime
+
+    The calendar difference is only worked out from scratch when the countdown starts, when the wall
+    clock jumps after a suspend and resume or a clock change, and when a borrow reaches the months or
+    the day rolls over (where a shorter month can clamp the difference). Every other tick re-anchors to
+    the monotonic clock and takes the elapsed time off the fields with carries and borrows.
+
+    With a zone the target is local time in that zone. The difference is also recomputed when the zone
+    changes its offset, so it stays correct across daylight saving time.
+    """
+
+    jump_tolerance = 1.0  # seconds the wall clock may wander from the monotonic one before recomputing
+
+    def __init__(self, clock=time.monotonic, wall_clock=time.time, fraction_digits=0, zone=None):
+        """Create a stopped countdown
+
+        :param clock: a function returning the current monotonic time in seconds
+        :param wall_clock: a function returning the current time as a timestamp
+        :param fraction_digits: how many digits of the seconds to count, 0, 1 or 2
+        :param zone: the IANA name of the target's time zone, the computer's local time if not given
+        """
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.set_zone(zone)
+        self.listeners = []
+        self.visible = True
+        self.reset()
+        self.set_fraction_digits(fraction_digits)
+
+    def reset(self):
+        """Resets the countdown back to it's initial condition"""
+        self.running = False
+        self.target = None
+        self.target_timestamp = 0.0
+        self.years = self.months = self.days = 0
+        self.day_units = 0  # what is left of the last day, in units of fraction_digits
+        self.units_left = 0  # everything that is left, in units of fraction_digits
+        self.deadline = 0.0
+        self._mono_anchor = 0.0
+        self._wall_anchor = 0.0
+        self._next_recompute = 0.0  # the wall clock timestamp of the next day boundary or offset change
+
+    def set_fraction_digits(self, digits):
+        """Changes how finely the countdown counts
+
+        :param digits: 0 for whole seconds, 1 for tenths or 2 for hundredths
+        """
+        if digits not in (0, 1, 2):
+            raise ValueError('fraction_digits must be 0, 1 or 2')
+        self.fraction_digits = digits
+        self.per_second = 10 ** digits
+        if self.running:
+            self.recompute()
+
+    def set_zone(self, zone):
+        """Changes the time zone of the target, the countdown has to be started again afterwards
+
+        :param zone: the IANA name of the zone, None for the computer's local time
+        """
+        self.zone = None if zone is None else ZoneTransitions.get(zone)
+
+    def _local(self, wall, tzinfo=None):
+        """Returns the local time at the wall clock timestamp wall"""
+        if self.zone is not None:
+            return self.zone.to_local(wall)
+        return datetime.datetime.fromtimestamp(wall, tzinfo)
+
+    def _timestamp(self, local):
+        """Returns the wall clock timestamp of a local time"""
+        if self.zone is not None and local.tzinfo is None:
+            return self.zone.to_timestamp(local)
+        return local.timestamp()
+
+    def start(self, target):
+        """Starts counting down to target
+
+        :param target: a datetime.datetime, naive for local time (in the zone if there is one) or aware
+        """
+        self.reset()
+        self.running = True
+        self.target = target
+        self.target_timestamp = self._timestamp(target)
+        self.recompute()
+
+    def start_at(self, timestamp):
+        """Starts counting down to a wall clock timestamp, shown as local time in the zone
+
+        :param timestamp: the target as seconds since the epoch
+        """
+        self.reset()
+        self.running = True
+        self.target = self._local(timestamp)
+        self.target_timestamp = timestamp  # exact, where the local time may be ambiguous
+        self.recompute()
+
+    def start_meetup(self, week, day_of_week=None, time_of_day=datetime.time(), start=None):
+        """Starts counting down to the next meetup of a rule that is still in the future
+
+        :param week: The week of the meetup (first, second, third, fourth, fifth, teenth, last), or a MeetupRule
+        :param day_of_week: The weekday name, left out when week is a MeetupRule
+        :param time_of_day: the datetime.time the meetup starts
+        :param start: the first date to look for a meetup on, today if not given
+        :return datetime.datetime: the meetup being counted down to
+        """
+        now = self._local(self.wall_clock(), time_of_day.tzinfo)
+        start = max(start or now.date(), now.date())
+        for meetup in MeetupSchedule(week, day_of_week, start):
+            target = datetime.datetime.combine(meetup, time_of_day)
+            if target > now:
+                self.start(target)
+                return target
+        raise MeetupDayException('There are no more meetups.')
+
+    def recompute(self, now=None, wall=None):
+        """Works the calendar difference out from scratch and re-anchors both clocks
+
+        :param now: the current monotonic time, read from the clock if not given
+        :param wall: the current wall clock timestamp, read from the wall clock if not given
+        """
+        now = self.clock() if now is None else now
+        wall = self.wall_clock() if wall is None else wall
+        self._mono_anchor = now
+        self._wall_anchor = wall
+
+        remaining = max(0.0, self.target_timestamp - wall)
+        self.deadline = now + remaining
+        self.units_left = math.ceil(round(remaining * self.per_second, 6))
+        if not self.units_left:
+            self.years = self.months = self.days = self.day_units = 0
+            return
+
+        moment = self._local(wall, self.target.tzinfo)
+        self.years, self.months, self.days, seconds = calendar_difference(moment, self.target)
+        self.day_units = math.ceil(round(seconds * self.per_second, 6))
+        if self.day_units >= 86400 * self.per_second:  # rounding up made a whole day
+            self.day_units -= 86400 * self.per_second
+            self.days += 1
+        midnight = datetime.datetime.combine(moment.date() + datetime.timedelta(days=1), datetime.time(),
+                                             moment.tzinfo)
+        self._next_recompute = self._timestamp(midnight)
+        if self.zone is not None:
+            transition = self.zone.next_transition(wall)
+            if transition is not None:
+                self._next_recompute = min(self._next_recompute, transition)
+
+    def _take(self, units):
+        """Takes units off the fields, borrowing from the days as needed
+
+        :return bool: False when the days ran out and a month has to be borrowed
+        """
+        day_units = 86400 * self.per_second
+        self.day_units -= units
+        if self.day_units >= 0:
+            return True
+
+        borrowed = -(self.day_units // day_units)
+        self.day_units += borrowed * day_units
+        self.days -= borrowed
+        return self.days >= 0
+
+    def get_YMDHMSF(self):
+        """Returns a tuple (years, months, days, hours, minutes, seconds, fraction)"""
+        seconds, fraction = divmod(self.day_units, self.per_second)
+        hours, seconds = divmod(seconds, 3600)
+        minutes, seconds = divmod(seconds, 60)
+        return self.years, self.months, self.days, hours, minutes, seconds, fraction
+
+    def notify(self):
+        """Calls every listener with this countdown"""
+        for listener in self.listeners:
+            listener(self)
+
+    def tick(self, now):
+        """Updates the fields from the monotonic clock
+
+        :param now: the current monotonic time
+        :return float: when the countdown next needs a tick, None when it is stopped or finished
+        """
+        if not self.running:
+            return None
+
+        wall = self.wall_clock()
+        if abs(wall - self._wall_anchor - (now - self._mono_anchor)) > self.jump_tolerance:
+            self.recompute(now, wall)  # the wall clock jumped
+        elif wall >= self._next_recompute:
+            self.recompute(now, wall)  # a new day or a new offset, the fields may not follow the elapsed time
+        else:
+            remaining = max(0.0, self.deadline - now)
+            units_left = math.ceil(round(remaining * self.per_second, 6))
+            if not self._take(self.units_left - units_left):
+                self.recompute(now, wall)  # borrowing a month, let calendar_difference do it
+            else:
+                self.units_left = units_left
+        self.notify()
+
+        if not self.units_left:
+            return None
+        remaining = self.deadline - now
+        if not self.visible:  # nobody is looking, just wake up when it runs out
+            return now + remaining
+        return now + remaining - (self.units_left - 1) / self.per_second
+
+
+class LogHistogram:
+    """Counts samples in buckets that double in width, in a fixed amount of memory
+
+    Bucket 0 holds everything below smallest and bucket i holds smallest * 2 ** (i - 1) up to
+    smallest * 2 ** i, with the last bucket catching everything bigger. Adding a sample only bumps a
+    counter, nothing is kept per sample, so a histogram can run for as long as the app does.
+    """
+
+    def __init__(self, smallest=1e-6, buckets=32):
+        """Create an empty histogram
+
+        :param smallest: the upper bound of the first bucket
+        :param buckets: how many buckets to count in
+        """
+        self.smallest = smallest
+        self.counts = array('Q', bytes(8 * buckets))
+        self.reset()
+
+    def reset(self):
+        """Forgets every sample"""
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        """Counts one sample"""
+        index = int(value / self.smallest).bit_length() if value > 0 else 0
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def upper_bound(self, index):
+        """Returns the biggest value that is counted in bucket index"""
+        return self.smallest * 2 ** index
+
+    def percentile(self, percent):
+        """Returns the upper bound of the bucket the percentile falls in, 0 when empty
+
+        :param percent: 0 - 100
+        """
+        if not self.count:
+            return 0.0
+        wanted = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= wanted:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        """Returns a dict of the count, mean, median, 99th percentile and max"""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class TickStats:
+    """How well the scheduler is keeping up, as LogHistograms
+
+    lateness: how long after its due time each tick ran, in seconds
+    tick: how long each timer's tick took, in seconds
+    redraw: how long each batch of redraws took, in seconds
+    updates: how many Tcl variables each batch of redraws set
+    """
+
+    def __init__(self):
+        self.lateness = LogHistogram()
+        self.tick = LogHistogram()
+        self.redraw = LogHistogram()
+        self.updates = LogHistogram(smallest=1, buckets=16)
+
+    def histograms(self):
+        """Returns a dict of name -> LogHistogram"""
+        return {'lateness': self.lateness, 'tick': self.tick, 'redraw': self.redraw, 'updates': self.updates}
+
+    def reset(self):
+        """Forgets every sample"""
+        for histogram in self.histograms().values():
+            histogram.reset()
+
+    def summary(self):
+        """Returns a dict of name -> the histogram's summary()"""
+        return {name: histogram.summary() for name, histogram in self.histograms().items()}
+
+
+class TimerScheduler:
+    """Drives many timers from one priority queue
+
+    Only the earliest due timer is armed with the host event loop, so a screen full of timers costs one
+    pending callback instead of one after() chain each. The host loop is reached through two functions:
+    arm(delay, callback) which calls callback after delay seconds and returns a handle, and cancel(handle).
+    """
+
+    def __init__(self, arm, cancel, clock=time.monotonic, stats=None):
+        """Create an empty scheduler
+
+        :param arm: schedules a callback with the host event loop
+        :param cancel: cancels a callback returned by arm
+        :param clock: a function returning the current time in seconds, time.monotonic by default
+        :param stats: a TickStats to record how late and how long each tick is, nothing is measured if not given
+        """
+        self.arm = arm
+        self.cancel = cancel
+        self.clock = clock
+        self.stats = stats
+
+        self._queue = []  # (due, sequence, timer) entries, only the newest entry of each timer is live
+        self._sequence = itertools.count()
+        self._live = {}  # timer -> sequence of its live entry
+        self._handle = None
+        self._armed_due = None
+
+    def schedule(self, timer, due=None):
+        """Schedules a tick of timer, replacing any tick it already has
+
+        :param timer: anything with a tick(now) method returning the next due time or None
+        :param due: when to tick the timer, now if not given
+        """
+        if due is None:
+            due = self.clock()
+        self._push(timer, due)
+        self._rearm()
+
+    def unschedule(self, timer):
+        """Removes any pending tick of timer, cancelling the host callback if nothing else is due then"""
+        if self._live.pop(timer, None) is not None:
+            self._rearm()
+
+    def __len__(self):
+        """Returns how many timers have a tick pending"""
+        return len(self._live)
+
+    def _push(self, timer, due):
+        """Adds a live entry for timer to the queue"""
+        sequence = next(self._sequence)
+        self._live[timer] = sequence
+        heapq.heappush(self._queue, (due, sequence, timer))
+
+    def _rearm(self):
+        """Makes sure the host loop wakes up for the earliest live entry and only for it"""
+        queue = self._queue
+        while queue and self._live.get(queue[0][2]) != queue[0][1]:  # drop stale entries
+            heapq.heappop(queue)
+        due = queue[0][0] if queue else None
+
+        if self._handle is not None:
+            if self._armed_due == due:
+                return
+            self.cancel(self._handle)
+            self._handle = None
+        if due is None:  # nothing to wait for, stay asleep
+            return
+        self._armed_due = due
+        self._handle = self.arm(max(0.0, due - self.clock()), self._run)
+
+    def _run(self):
+        """Ticks every timer that is due and arms the next wake up"""
+        self._handle = None
+        now = self.clock()
+        queue = self._queue
+        stats = self.stats
+        while queue and queue[0][0] <= now:
+            scheduled, sequence, timer = heapq.heappop(queue)
+            if self._live.get(timer) != sequence:
+                continue
+            del self._live[timer]
+            if stats is None:
+                due = timer.tick(now)
+            else:
+                stats.lateness.add(now - scheduled)
+                started = time.perf_counter()
+                due = timer.tick(now)
+                stats.tick.add(time.perf_counter() - started)
+            if due is not None:
+                self._push(timer, due)
+        self._rearm()
@@ -0,0 +1,204 @@
+"""Exports meetup schedules as iCalendar events or CSV rows
+
+Reads groups as CSV rows like "Python Meetup,Second,Tuesday,7:30 PM" from a file or stdin and writes
+the meetups between two dates. In iCalendar each group becomes one VEVENT with a monthly RRULE
+(BYDAY=2TU for the second Tuesday, BYDAY=-1FR for the last Friday, BYDAY=TH;BYMONTHDAY=13,...,19 for
+the teenth Thursday), so the file stays small however long the range is. With --expand, and always
+for CSV, every occurrence is written out instead.
+
+Everything is a chain of generators ending in buffered writes, so memory stays constant however
+many groups and occurrences there are.
+
+    python app.py export [--format ics|csv] [--expand] [--start DATE] [--end DATE] [--duration MINUTES] [file]
+"""
+import argparse
+import csv
+import datetime
+import io
+import sys
+import uuid
+
+from core import MeetupDate, MeetupRule, MeetupSchedule
+
+DAY_CODES = ['SU', 'MO', 'TU', 'WE', 'TH', 'FR', 'SA']  # in the order of MeetupDate.days_of_week
+TEENTH_DAYS = ','.join(str(day) for day in range(13, 20))
+
+
+def parse_start_time(text):
+    """Returns the datetime.time of a start time such as "7:30 PM", as picked in MeetupTimerSet"""
+    return datetime.datetime.strptime(text.strip(), '%I:%M %p').time()
+
+
+def read_groups(lines):
+    """Generates (name, rule, start_time) for each CSV row of lines, reporting bad rows on stderr
+
+    :param lines: rows of name,week,day_of_week,start_time
+    """
+    for number, row in enumerate(csv.reader(lines), start=1):
+        if not row:
+            continue
+        try:
+            name, week, day_of_week, start_time = row
+            yield name, MeetupRule(week.strip(), day_of_week.strip()), parse_start_time(start_time)
+        except KeyError as error:
+            print(f'row {number}: unknown name {error}', file=sys.stderr)
+        except ValueError as error:
+            print(f'row {number}: {error}', file=sys.stderr)
+
+
+def rrule(rule, until):
+    """Returns the RRULE value for a meetup rule
+
+    :param rule: the MeetupRule
+    :param until: the last date the rule may produce
+    """
+    day = DAY_CODES[rule.week_day]
+    if rule.occurrence == MeetupDate.occurrences['Teenth']:
+        by_day = f'BYDAY={day};BYMONTHDAY={TEENTH_DAYS}'
+    elif rule.occurrence == MeetupDate.occurrences['Last']:
+        by_day = f'BYDAY=-1{day}'
+    else:
+        by_day = f'BYDAY={rule.occurrence}{day}'
+    return f'FREQ=MONTHLY;{by_day};UNTIL={until:%Y%m%d}T235959'
+
+
+def escape(text):
+    """Escapes text for an iCalendar TEXT value"""
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def fold(line):
+    """Folds a content line at 75 octets and ends it with CRLF, as RFC 5545 asks"""
+    if len(line) <= 75 and line.isascii():
+        return line + '\r\n'
+    parts = []
+    part, octets = [], 0
+    for character in line:
+        size = len(character.encode())
+        if octets + size > 75:
+            parts.append(''.join(part))
+            part, octets = [' '], 1  # continuation lines start with a space
+        part.append(character)
+        octets += size
+    parts.append(''.join(part))
+    return '\r\n'.join(parts) + '\r\n'
+
+
+def vevent(uid, stamp, name, rule, start, duration, repeat_until=None):
+    """Returns one VEVENT
+
+    :param uid: the event's unique id
+    :param stamp: the DTSTAMP, when the export was made
+    :param name: the group's name
+    :param rule: the group's MeetupRule
+    :param start: the datetime.datetime of the (first) meetup, floating local time
+    :param duration: the datetime.timedelta each meetup lasts
+    :param repeat_until: the last date of an RRULE, a single event if not given
+    """
+    minutes = int(duration.total_seconds()) // 60
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{stamp:%Y%m%dT%H%M%SZ}',
+        f'DTSTART:{start:%Y%m%dT%H%M%S}',
+        f'DURATION:PT{minutes // 60}H{minutes % 60}M',
+        f'SUMMARY:{escape(name)}',
+        f'DESCRIPTION:{escape(str(rule))}',
+    ]
+    if repeat_until is not None:
+        lines.append(f'RRULE:{rrule(rule, repeat_until)}')
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) for line in lines)
+
+
+def ics_chunks(groups, start, end, duration, expand=False):
+    """Generates an iCalendar file in pieces
+
+    :param groups: (name, rule, start_time) tuples
+    :param start: the first date to export
+    :param end: the last date to export
+    :param duration: the datetime.timedelta each meetup lasts
+    :param expand: write every occurrence as its own VEVENT instead of one RRULE per group
+    """
+    stamp = datetime.datetime.now(datetime.timezone.utc)
+    yield 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//CountDown//Meetup export//EN\r\n'
+    for name, rule, start_time in groups:
+        group_id = uuid.uuid5(uuid.NAMESPACE_URL, f'countdown:{name}:{rule}:{start_time}')
+        meetups = MeetupSchedule(rule).between(start, end)
+        if not expand:
+            first = next(meetups, None)
+            if first is not None:
+                yield vevent(f'{group_id}@countdown', stamp, name, rule, datetime.datetime.combine(first, start_time),
+                             duration, repeat_until=end)
+            continue
+        for meetup in meetups:
+            yield vevent(f'{group_id}-{meetup:%Y%m%d}@countdown', stamp, name, rule,
+                         datetime.datetime.combine(meetup, start_time), duration)
+    yield 'END:VCALENDAR\r\n'
+
+
+def csv_chunks(groups, start, end, duration, expand=True, rows_per_chunk=1000):
+    """Generates CSV rows of group, rule, start and end in pieces of rows_per_chunk rows
+
+    Takes the same arguments as ics_chunks, CSV is always expanded.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(['group', 'rule', 'start', 'end'])
+    rows = 0
+    for name, rule, start_time in groups:
+        for meetup in MeetupSchedule(rule).between(start, end):
+            begins = datetime.datetime.combine(meetup, start_time)
+            writer.writerow([name, rule, begins.isoformat(), (begins + duration).isoformat()])
+            rows += 1
+            if rows >= rows_per_chunk:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+                rows = 0
+    yield output.getvalue()
+
+
+def write_buffered(chunks, output, size=1 << 16):
+    """Writes chunks to output in writes of about size characters"""
+    buffer, buffered = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            output.write(''.join(buffer))
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        output.write(''.join(buffer))
+
+
+EXPORTERS = {'ics': ics_chunks, 'csv': csv_chunks}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='app.py export', description='Export meetup schedules.')
+    parser.add_argument('file', nargs='?', default='-', help='rows of name,week,day_of_week,start_time, stdin if not given')
+    parser.add_argument('--format', choices=EXPORTERS, default='ics', help='ics (the default) or csv')
+    parser.add_argument('--expand', action='store_true', help='write every occurrence as its own event')
+    parser.add_argument('--start', type=datetime.date.fromisoformat, default=None, help='the first date, today if not given')
+    parser.add_argument('--end', type=datetime.date.fromisoformat, default=None, help='the last date, a year after start if not given')
+    parser.add_argument('--duration', type=int, default=120, help='how long each meetup lasts in minutes')
+    args = parser.parse_args(argv)
+
+    start = args.start or datetime.date.today()
+    end = args.end or start + datetime.timedelta(days=365)
+    source = sys.stdin if args.file == '-' else open(args.file, newline='')
+    sys.stdout.reconfigure(newline='')  # iCalendar lines already end in CRLF
+    try:
+        chunks = EXPORTERS[args.format](read_groups(source), start, end, datetime.timedelta(minutes=args.duration),
+                                        expand=args.expand)
+        write_buffered(chunks, sys.stdout)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""Things to do when a timer runs out, run off the Tk thread
+
+Each hook is handed to a bounded pool of worker threads and has its own timeout, enforced by a
+watchdog that reports the hook as timed out and frees its slot. Results come back through a queue
+that the GUI drains from a single after() poller, so a slow hook never stalls the mainloop or delays
+the other timers.
+"""
+import collections
+import json
+import logging
+import os
+import queue
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('countdown')
+
+ExpiryEvent = collections.namedtuple('ExpiryEvent', ['name', 'expired_at'])  # timer name, wall clock timestamp
+HookResult = collections.namedtuple('HookResult', ['hook', 'event', 'ok', 'detail'])
+
+
+class ExpiryHook:
+    """Something to do when a timer runs out
+
+    Subclasses implement run(event), which is called on a worker thread and should give up after
+    self.timeout seconds. If it doesn't, the dispatcher reports it as timed out anyway, but a thread
+    can't be stopped from outside, so its worker stays busy until run returns. CommandHook and
+    UnixSocketHook give up on their own, a hook that can hang forever should too.
+    """
+
+    timeout = 5.0
+
+    def __init__(self, timeout=None):
+        """
+        :param timeout: how many seconds the hook may take, the class default if not given
+        """
+        if timeout is not None:
+            self.timeout = timeout
+
+    def run(self, event):
+        """Does the work for event
+
+        :param event: the ExpiryEvent of the timer that ran out
+        :return str: a short description of what happened
+        """
+        raise NotImplementedError
+
+    def __str__(self):
+        return type(self).__name__
+
+
+class LogHook(ExpiryHook):
+    """Writes a log line"""
+
+    def __init__(self, level=logging.INFO, timeout=None):
+        super().__init__(timeout)
+        self.level = level
+
+    def run(self, event):
+        logger.log(self.level, 'timer %s expired at %s', event.name, time.ctime(event.expired_at))
+        return 'logged'
+
+
+class CommandHook(ExpiryHook):
+    """Runs a shell command, with the timer name in the COUNTDOWN_TIMER environment variable"""
+
+    def __init__(self, command, timeout=None):
+        """
+        :param command: the command line, run through the shell
+        :param timeout: how many seconds the command may run before it is killed
+        """
+        super().__init__(timeout)
+        self.command = command
+
+    def run(self, event):
+        env = dict(os.environ, COUNTDOWN_TIMER=str(event.name))
+        completed = subprocess.run(self.command, shell=True, env=env, timeout=self.timeout,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if completed.returncode:
+            raise RuntimeError(f'exited with {completed.returncode}')
+        return 'ran'
+
+    def __str__(self):
+        return f'CommandHook({self.command!r})'
+
+
+class SoundHook(CommandHook):
+    """Plays a sound file with the platform's command line player"""
+
+    def __init__(self, path, player=None, timeout=None):
+        """
+        :param path: the sound file to play
+        :param player: the command to play it with, afplay on macOS, aplay elsewhere if not given
+        :param timeout: how many seconds the sound may play before it is cut off
+        """
+        if player is None:
+            player = 'afplay' if sys.platform == 'darwin' else 'aplay'
+        super().__init__(f'{player} {shlex.quote(path)}', timeout)
+
+
+class UnixSocketHook(ExpiryHook):
+    """Writes the event as a JSON line to a local Unix socket"""
+
+    def __init__(self, path, timeout=None):
+        """
+        :param path: the path of the listening socket
+        :param timeout: how many seconds connecting and sending may take
+        """
+        super().__init__(timeout)
+        self.path = path
+
+    def run(self, event):
+        message = json.dumps(event._asdict()) + '\n'
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.timeout)
+            connection.connect(self.path)
+            connection.sendall(message.encode())
+        return 'sent'
+
+    def __str__(self):
+        return f'UnixSocketHook({self.path!r})'
+
+
+class HookDispatcher:
+    """Runs the hooks for every expiry on a bounded thread pool
+
+    No more than max_pending hooks wait or run at once, anything beyond that is dropped and reported
+    as a failed result instead of queueing up behind a stuck hook. A hook still running after its
+    timeout is reported as timed out and no longer counts as pending, whatever it reports later is
+    only logged.
+    """
+
+    def __init__(self, hooks=(), max_workers=4, max_pending=64):
+        """
+        :param hooks: the ExpiryHooks to run for every expiry
+        :param max_workers: how many hooks may run at the same time
+        :param max_pending: how many hooks may be waiting or running before new ones are dropped
+        """
+        self.hooks = list(hooks)
+        self.results = queue.SimpleQueue()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='expiry-hook')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+
+    def fire(self, event):
+        """Hands every hook to the pool for event, returns straight away"""
+        for hook in self.hooks:
+            if not self._slots.acquire(blocking=False):
+                self.results.put(HookResult(hook, event, False, 'dropped, too many hooks pending'))
+                continue
+            with self._lock:
+                self.pending += 1
+            self._executor.submit(self._run, hook, event)
+
+    def _run(self, hook, event):
+        """Runs one hook on a worker thread and queues its result, or a timeout if the watchdog fires first"""
+        reported = threading.Lock()  # whoever takes it first reports, the hook or its watchdog
+
+        def report(ok, detail):
+            if not reported.acquire(blocking=False):
+                return False
+            self.results.put(HookResult(hook, event, ok, detail))
+            self._slots.release()
+            with self._lock:  # after the put, so busy() never sees neither
+                self.pending -= 1
+            return True
+
+        watchdog = threading.Timer(hook.timeout, report, (False, f'timed out after {hook.timeout} s'))
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            detail = hook.run(event)
+            ok = True
+        except subprocess.TimeoutExpired:
+            ok, detail = False, f'timed out after {hook.timeout} s'
+        except Exception as error:  # a broken hook must not take the pool down with it
+            ok, detail = False, f'{type(error).__name__}: {error}'
+        watchdog.cancel()
+        if not report(ok, detail):
+            logger.warning('%s for timer %s finished after it timed out: %s', hook, event.name, detail)
+
+    def drain(self):
+        """Returns every result that has come back so far, without waiting"""
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def busy(self):
+        """Returns True while hooks are running or results are waiting to be drained"""
+        return self.pending > 0 or not self.results.empty()
+
+    def shutdown(self):
+        """Stops the pool without waiting for running hooks"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
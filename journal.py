@@ -0,0 +1,198 @@
+"""Crash-safe persistence of running timers
+
+Every start, pause, resume and stop is appended to a journal of JSON lines holding absolute wall clock
+deadlines, so a restart can fast-forward each timer to the right remaining time. The journal is
+written by a background thread that fsyncs once per batch of records and every so often compacts
+everything into a snapshot, after which the journal starts again empty. Loading is one pass over the
+snapshot and the journal.
+
+Only one process may use a journal directory at a time, it holds an exclusive lock on a lock file
+in the directory for as long as the journal is open.
+
+A timer's state is a dict:
+    {'kind': 'simple', 'deadline': timestamp, 'paused_at': timestamp or None}
+    {'kind': 'meetup', 'week': ..., 'day_of_week': ..., 'time': 'HH:MM', 'start_date': ISO date or None,
+     'zone': IANA name or None}
+"""
+import json
+import logging
+import os
+import queue
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+JOURNAL_NAME = 'journal.jsonl'
+SNAPSHOT_NAME = 'snapshot.json'
+LOCK_NAME = 'lock'
+
+logger = logging.getLogger('countdown')
+
+
+class JournalLocked(RuntimeError):
+    """Raised when another process already has the journal directory open"""
+
+
+def apply(states, record):
+    """Applies one journal record to the timer states
+
+    :param states: dict of timer name -> state, updated in place
+    :param record: the journal record
+    """
+    name, event = record['timer'], record['event']
+    if event == 'start':
+        states[name] = {'kind': 'simple', 'deadline': record['deadline'], 'paused_at': None}
+    elif event == 'meetup':
+        states[name] = {
+            'kind': 'meetup',
+            'week': record['week'],
+            'day_of_week': record['day_of_week'],
+            'time': record['time'],
+            'start_date': record.get('start_date'),
+            'zone': record.get('zone'),
+        }
+    elif event == 'pause' and name in states:
+        states[name]['paused_at'] = record['at']
+    elif event == 'resume' and name in states and states[name]['paused_at'] is not None:
+        state = states[name]
+        state['deadline'] += record['at'] - state['paused_at']  # the paused time doesn't count
+        state['paused_at'] = None
+    elif event in ('stop', 'expire'):
+        states.pop(name, None)
+
+
+class TimerJournal:
+    """An append-only journal of timer events with a compacted snapshot"""
+
+    def __init__(self, directory, compact_every=1000, batch_size=256):
+        """Load the saved timers and start the writer thread
+
+        :param directory: where the journal and snapshot are kept, created if needed
+        :param compact_every: how many records to journal before compacting into a snapshot
+        :param batch_size: the most records to write before an fsync
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, LOCK_NAME), 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self._lock_file.close()
+            raise JournalLocked(f'{directory} is in use by another process') from None
+
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.compact_every = compact_every
+        self.batch_size = batch_size
+
+        self.states, self.sequence = self.load()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write, name='timer-journal', daemon=True)
+        self._thread.start()
+
+    def load(self):
+        """Reads the snapshot and replays the journal after it
+
+        A line torn by a crash or a record that can't be read ends the journal, it is truncated there
+        so new records aren't appended after it.
+
+        :return tuple[dict, int]: the timer states and the sequence number of the last record
+        """
+        states, sequence = {}, 0
+        try:
+            with open(self.snapshot_path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            states, sequence = snapshot['timers'], snapshot['sequence']
+        except FileNotFoundError:
+            pass
+
+        try:
+            with open(self.journal_path, 'rb+') as journal_file:
+                good = 0  # where the last complete line ends
+                for line in journal_file:
+                    if not line.endswith(b'\n'):  # torn by a crash, cut it off before appending again
+                        journal_file.truncate(good)
+                        break
+                    try:
+                        record = json.loads(line)
+                        # records already in the snapshot are left over from a compaction that was cut short
+                        if record['sequence'] > sequence:
+                            apply(states, record)
+                            sequence = record['sequence']
+                    except (ValueError, KeyError, TypeError) as error:  # corrupt, nothing after it can be trusted
+                        logger.warning('corrupt journal record at byte %d of %s (%r), dropping it and everything after it',
+                                       good, self.journal_path, error)
+                        journal_file.truncate(good)
+                        break
+                    good += len(line)
+        except FileNotFoundError:
+            pass
+        return states, sequence
+
+    def record(self, timer, event, **fields):
+        """Queues a record for the writer thread, returns straight away
+
+        :param timer: the name of the timer
+        :param event: start, pause, resume, stop, expire or meetup
+        :param fields: the rest of the record, see apply()
+        """
+        self.sequence += 1
+        record = dict(fields, timer=timer, event=event, sequence=self.sequence)
+        self._queue.put(record)
+
+    def close(self):
+        """Writes everything still queued, stops the writer thread and lets go of the directory"""
+        self._queue.put(None)
+        self._thread.join()
+        self._lock_file.close()  # closing it releases the lock
+
+    def _write(self):
+        """The writer thread, appends records in batches with one fsync each"""
+        states = {name: dict(state) for name, state in self.states.items()}
+        sequence = self.sequence
+        since_compaction = 0
+        journal_file = open(self.journal_path, 'a')
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                closing = batch[-1] is None
+                records = [record for record in batch if record is not None]
+
+                if records:
+                    journal_file.write(''.join(json.dumps(record) + '\n' for record in records))
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+                    for record in records:
+                        apply(states, record)
+                    sequence = records[-1]['sequence']
+                    since_compaction += len(records)
+
+                if since_compaction >= self.compact_every:
+                    journal_file.close()
+                    self._compact(states, sequence)
+                    journal_file = open(self.journal_path, 'w')
+                    since_compaction = 0
+                if closing:
+                    return
+        finally:
+            journal_file.close()
+
+    def _compact(self, states, sequence):
+        """Replaces the snapshot with states and empties the journal"""
+        temporary_path = self.snapshot_path + '.tmp'
+        with open(temporary_path, 'w') as snapshot_file:
+            json.dump({'sequence': sequence, 'timers': states}, snapshot_file)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, self.snapshot_path)
@@ -0,0 +1,110 @@
+"""Precomputed meetup dates for one 400-year Gregorian cycle
+
+The table holds the day of the month for every month of the cycle, every entry in
+MeetupDate.occurrences and every weekday, one byte each with 0 meaning the day does not exist.
+The file is memory-mapped read only, so every process that opens it shares one copy through
+the page cache, and a lookup is a single index calculation.
+
+Build the table once with:
+    python meetup_table.py build [path]
+"""
+import mmap
+import sys
+from array import array
+from datetime import date
+
+from core import MeetupDate, MeetupDayException, MeetupRule
+
+MAGIC = b'MEETUP1\n'
+DEFAULT_PATH = 'meetup_table.bin'
+
+WEEKS = len(MeetupDate.occurrences)
+DAYS = len(MeetupDate.days_of_week)
+MONTHS = 400 * 12
+SIZE = len(MAGIC) + MONTHS * WEEKS * DAYS
+
+
+def build(path=DEFAULT_PATH):
+    """Computes every meetup day of the cycle and writes the table
+
+    :param path: where to write the table
+    """
+    days = array('B')
+    for year in range(2000, 2400):  # 2000 % 400 == 0, so the rows are in cycle order
+        for month in range(1, 13):
+            for occurrence in MeetupDate.occurrences.values():
+                for week_day in range(DAYS):
+                    try:
+                        days.append(MeetupDate.find_occurrence(year, month, week_day, occurrence).day)
+                    except MeetupDayException:
+                        days.append(0)
+
+    with open(path, 'wb') as table_file:
+        table_file.write(MAGIC)
+        days.tofile(table_file)
+
+
+class MeetupTable:
+    """Looks meetup dates up in a memory-mapped table written by build()"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        """Map the table into memory
+
+        :param path: the table written by build()
+        """
+        with open(path, 'rb') as table_file:
+            self._map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) != SIZE or self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f'{path} is not a meetup table')
+
+        # offsets of each week and weekday within a month's block of the table
+        self._weeks = {week: index * DAYS for index, week in enumerate(MeetupDate.occurrences)}
+        self._days = dict(MeetupDate.days_of_week)
+
+    def day(self, year, month, week, day_of_week=None):
+        """Returns the day of the month of the meetup, 0 if it does not exist
+
+        :param year: The year of the meetup
+        :param month: The month of the meetup
+        :param week: The week of the meetup (first, second, third, fourth, fifth, teenth, last), or a MeetupRule
+        :param day_of_week: The weekday name, left out when week is a MeetupRule
+        """
+        if not 1 <= month <= 12:
+            raise ValueError('month must be in 1..12')
+        if isinstance(week, MeetupRule):  # the rules are numbered in table order
+            rule_offset = week.index
+        else:
+            rule_offset = self._weeks[week] + self._days[day_of_week]
+        month_offset = ((year % 400) * 12 + month - 1) * WEEKS * DAYS
+        return self._map[len(MAGIC) + month_offset + rule_offset]
+
+    def meetup(self, year, month, week, day_of_week=None):
+        """Calculate the meetup date the same way as MeetupDate.meetup, from the table
+
+        :param year: The year of the meetup
+        :param month: The month of the meetup
+        :param week: The week of the meetup (first, second, third, fourth, fifth, teenth, last), or a MeetupRule
+        :param day_of_week: The weekday name, left out when week is a MeetupRule
+        :return datetime.date: The actual date of the meetup
+        """
+        day = self.day(year, month, week, day_of_week)
+        if not day:
+            raise MeetupDayException('That day does not exist.')
+        return date(year, month, day)
+
+    def close(self):
+        """Unmaps the table"""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != 'build':
+        sys.exit(f'usage: {sys.argv[0]} build [path]')
+    build(*sys.argv[2:])
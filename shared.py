@@ -0,0 +1,146 @@
+"""Countdown state shared between processes through one block of shared memory
+
+One owner process publishes its timers into a fixed layout block and any number of follower
+processes on the same machine read it, so every screen counts down to the very same deadlines.
+The simple timer's deadline is on time.monotonic(), which every process on the machine shares, and
+the meetup's target is a wall clock timestamp.
+
+The block is guarded by a seqlock: the owner makes the sequence number odd, writes the state and
+makes it even again. A reader reads the sequence number, the state and the sequence number again,
+and tries again if the two differ or were odd. Nothing is locked and nothing is serialized, a
+follower that polls and finds the sequence number unchanged has done a single 8 byte read.
+"""
+import collections
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+DEFAULT_NAME = 'countdown'
+
+STOPPED, RUNNING, PAUSED = 0, 1, 2
+
+SEQUENCE = struct.Struct('<Q')
+# timer state, its deadline, the seconds left while paused, whether there is a meetup, its target
+# timestamp, its zone and the line describing it
+STATE = struct.Struct('<B7xdd?7xd64s128s')
+SIZE = SEQUENCE.size + STATE.size
+
+SharedState = collections.namedtuple(
+    'SharedState',
+    ['timer', 'deadline', 'remaining', 'meetup', 'target', 'zone', 'label'],
+)
+EMPTY = SharedState(STOPPED, 0.0, 0.0, False, 0.0, '', '')
+
+
+def _attach(name):
+    """Opens an existing block without letting this process's resource tracker remove it at exit"""
+    try:
+        try:
+            return shared_memory.SharedMemory(name, track=False)  # Python 3.13 and later
+        except TypeError:
+            memory = shared_memory.SharedMemory(name)
+    except FileNotFoundError:
+        raise FileNotFoundError(f'no countdown is being shared as {name!r}, start one with --share=owner') from None
+    if os.name == 'posix':  # before 3.13 every process that attaches also registers the block
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
+
+
+class SharedCountdown:
+    """The shared block, written by the owner and read by the followers"""
+
+    def __init__(self, name=DEFAULT_NAME, owner=False):
+        """Create the block as the owner or attach to it as a follower
+
+        :param name: the name of the block, the same in every process
+        :param owner: True in the one process that publishes
+        """
+        self.owner = owner
+        if owner:
+            try:
+                self._memory = shared_memory.SharedMemory(name, create=True, size=SIZE)
+            except FileExistsError:  # left behind by an owner that crashed
+                self._memory = shared_memory.SharedMemory(name)
+        else:
+            self._memory = _attach(name)
+        if self._memory.size < SIZE:
+            self._memory.close()
+            raise ValueError(f'{name} is not a shared countdown')
+        self._buffer = self._memory.buf
+        self.state = EMPTY
+        if owner:
+            self.publish()
+
+    def publish(self, **changes):
+        """Changes some fields of the state and writes the whole state to the block
+
+        :param changes: the fields of SharedState to change
+        """
+        state = self.state = self.state._replace(**changes)
+        buffer = self._buffer
+        sequence = SEQUENCE.unpack_from(buffer)[0] | 1  # odd while writing, even if it was left odd
+        SEQUENCE.pack_into(buffer, 0, sequence)
+        STATE.pack_into(buffer, SEQUENCE.size, state.timer, state.deadline, state.remaining, state.meetup,
+                        state.target, state.zone.encode()[:64], state.label.encode()[:128])
+        SEQUENCE.pack_into(buffer, 0, sequence + 1)
+
+    def version(self):
+        """Returns the sequence number, which changes on every publish"""
+        return SEQUENCE.unpack_from(self._buffer)[0]
+
+    def read(self):
+        """Reads a consistent copy of the state
+
+        :return tuple[int, SharedState]: the sequence number the state was published with, and the state
+        """
+        buffer = self._buffer
+        while True:
+            before = SEQUENCE.unpack_from(buffer)[0]
+            if before & 1:  # the owner is writing
+                time.sleep(0)
+                continue
+            fields = STATE.unpack_from(buffer, SEQUENCE.size)
+            if SEQUENCE.unpack_from(buffer)[0] == before:
+                break
+        timer, deadline, remaining, meetup, target, zone, label = fields
+        return before, SharedState(timer, deadline, remaining, meetup, target,
+                                   zone.rstrip(b'\0').decode(errors='ignore'),
+                                   label.rstrip(b'\0').decode(errors='ignore'))
+
+    def close(self):
+        """Detaches from the block, the owner also removes it"""
+        self._buffer = None
+        self._memory.close()
+        if self.owner:
+            self._memory.unlink()
+
+
+class SharedFollower:
+    """Polls the block from the scheduler and hands each new state to the listeners
+
+    Schedule it like a timer. While nothing is published a poll is a single read of the sequence number.
+    """
+
+    def __init__(self, shared, poll=0.1):
+        """
+        :param shared: the SharedCountdown to follow
+        :param poll: how often to look for changes, in seconds
+        """
+        self.shared = shared
+        self.poll = poll
+        self.listeners = []
+        self.version = None
+
+    def tick(self, now):
+        """Calls every listener with the state if it changed since the last tick
+
+        :param now: the current time on the scheduler's clock
+        :return float: when to look again
+        """
+        if self.shared.version() != self.version:
+            self.version, state = self.shared.read()
+            for listener in self.listeners:
+                listener(state)
+        return now + self.poll
@@ -0,0 +1,21 @@
+import pytest
+
+from core import MeetupDate
+
+
+def test_meetup_many_marks_months_outside_the_year_invalid():
+    np = pytest.importorskip('numpy')
+    dates, valid = MeetupDate.meetup_many([2022], [0, 1, 12, 13], ['First'], ['Monday'])
+    assert valid.tolist() == [False, True, True, False]
+    assert np.isnat(dates[[0, 3]]).all()
+
+
+def test_meetup_many_marks_years_outside_date_range_invalid():
+    np = pytest.importorskip('numpy')
+    dates, valid = MeetupDate.meetup_many([0, 1, 9999, 10000], [1], ['First'], ['Monday'])
+    assert valid.tolist() == [False, True, True, False]
+    assert np.isnat(dates[[0, 3]]).all()
+    with pytest.raises(ValueError):
+        MeetupDate.meetup(0, 1, 'First', 'Monday')
+    with pytest.raises(ValueError):
+        MeetupDate.meetup(10000, 1, 'First', 'Monday')
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from hooks import ExpiryEvent, ExpiryHook, HookDispatcher
+
+
+class BlockingHook(ExpiryHook):
+    """Hangs until released, ignoring its timeout"""
+
+    def __init__(self, timeout=None):
+        super().__init__(timeout)
+        self.release = threading.Event()
+
+    def run(self, event):
+        self.release.wait()
+        return 'released'
+
+
+class QuickHook(ExpiryHook):
+    def run(self, event):
+        return 'done'
+
+
+def wait_for_results(dispatcher, count, timeout=5.0):
+    results = []
+    deadline = time.monotonic() + timeout
+    while len(results) < count and time.monotonic() < deadline:
+        results += dispatcher.drain()
+        time.sleep(0.01)
+    return results
+
+
+def test_hook_result_is_reported():
+    dispatcher = HookDispatcher([QuickHook()])
+    dispatcher.fire(ExpiryEvent('tea', 0.0))
+    [result] = wait_for_results(dispatcher, 1)
+    dispatcher.shutdown()
+    assert result.ok and result.detail == 'done'
+    assert not dispatcher.busy()
+
+
+def test_hung_hook_times_out_and_frees_its_slot():
+    hook = BlockingHook(timeout=0.05)
+    dispatcher = HookDispatcher([hook], max_workers=2, max_pending=1)
+    try:
+        dispatcher.fire(ExpiryEvent('tea', 0.0))
+        [result] = wait_for_results(dispatcher, 1)
+        assert not result.ok and result.detail == 'timed out after 0.05 s'
+        assert dispatcher.pending == 0
+
+        dispatcher.fire(ExpiryEvent('eggs', 0.0))  # would be dropped if the slot were still held
+        [result] = wait_for_results(dispatcher, 1)
+        assert result.detail == 'timed out after 0.05 s'
+
+        hook.release.set()  # finishing late is only logged, not reported a second time
+        time.sleep(0.1)
+        assert dispatcher.drain() == []
+        assert not dispatcher.busy()
+    finally:
+        hook.release.set()
+        dispatcher.shutdown()
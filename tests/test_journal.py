@@ -0,0 +1,47 @@
+import json
+import logging
+import os
+
+from journal import JOURNAL_NAME, TimerJournal
+
+
+def write_lines(directory, lines):
+    with open(os.path.join(directory, JOURNAL_NAME), 'wb') as journal_file:
+        journal_file.write(b''.join(lines))
+
+
+def record_line(sequence, timer, deadline):
+    record = {'sequence': sequence, 'timer': timer, 'event': 'start', 'deadline': deadline}
+    return json.dumps(record).encode() + b'\n'
+
+
+def test_load_stops_at_a_torn_line(tmp_path):
+    first = record_line(1, 'tea', 100.0)
+    write_lines(tmp_path, [first, b'{"sequence": 2, "tim'])
+    journal = TimerJournal(tmp_path)
+    journal.close()
+    assert journal.states == {'tea': {'kind': 'simple', 'deadline': 100.0, 'paused_at': None}}
+    assert journal.sequence == 1
+    assert os.path.getsize(tmp_path / JOURNAL_NAME) == len(first)
+
+
+def test_load_stops_at_a_corrupt_line_in_the_middle(tmp_path, caplog):
+    first = record_line(1, 'tea', 100.0)
+    write_lines(tmp_path, [first, b'\x00garbage{\n', record_line(3, 'eggs', 200.0)])
+    with caplog.at_level(logging.WARNING, logger='countdown'):
+        journal = TimerJournal(tmp_path)
+        journal.close()
+    assert journal.states == {'tea': {'kind': 'simple', 'deadline': 100.0, 'paused_at': None}}
+    assert journal.sequence == 1
+    assert os.path.getsize(tmp_path / JOURNAL_NAME) == len(first)
+    assert 'corrupt journal record' in caplog.text
+
+
+def test_load_stops_at_a_record_without_a_sequence(tmp_path):
+    first = record_line(1, 'tea', 100.0)
+    write_lines(tmp_path, [first, b'{"timer": "eggs", "event": "start", "deadline": 200.0}\n',
+                           record_line(3, 'eggs', 200.0)])
+    journal = TimerJournal(tmp_path)
+    journal.close()
+    assert list(journal.states) == ['tea']
+    assert os.path.getsize(tmp_path / JOURNAL_NAME) == len(first)